@@ -2,9 +2,13 @@
 Dashboard output helper for bot-core.
 """
 
+import sys
 from datetime import datetime
 from typing import Optional
 
+_SEP = "═" * 70
+_SEP_THIN = "─" * 70
+
 
 def _fmt_pct(value: Optional[float]) -> str:
     if value is None:
@@ -15,11 +19,30 @@ def _fmt_pct(value: Optional[float]) -> str:
         return "-"
 
 
-def _fmt_num(value: Optional[float], decimals: int = 2) -> str:
+# Casas decimais fixas: format spec literal em vez de montado a cada chamada
+def _fmt0(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    try:
+        return f"{float(value):.0f}"
+    except (TypeError, ValueError):
+        return "-"
+
+
+def _fmt2(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    try:
+        return f"{float(value):.2f}"
+    except (TypeError, ValueError):
+        return "-"
+
+
+def _fmt6(value: Optional[float]) -> str:
     if value is None:
         return "-"
     try:
-        return f"{float(value):.{decimals}f}"
+        return f"{float(value):.6f}"
     except (TypeError, ValueError):
         return "-"
 
@@ -43,21 +66,26 @@ def print_dashboard(
 ) -> None:
     """Print a concise status dashboard to stdout."""
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print("\n" + "═" * 70)
-    print(f"🕒 {now} | {symbol} | MODO: {modo}")
-    print("─" * 70)
-    print(f"Tendência H1     : {tendencia_h1}")
-    print(f"Pullback M15     : {pullback_m15}")
-    print(f"ATR M15          : {_fmt_num(atr_m15, 6)}")
-    print(f"Status Entrada   : {status_entrada}")
-    print(f"Posição Aberta   : {'SIM' if posicao_aberta else 'NÃO'}")
-    print(f"Trades Hoje      : {trades_hoje}")
-    print(f"PnL Hoje         : {_fmt_num(pnl_hoje, 2)}")
-    print(f"Drawdown Dia     : {_fmt_num(drawdown_dia, 2)}")
-    print("─" * 70)
-    print(f"Score            : {_fmt_num(score, 0)}/100")
-    print(f"Prob BUY         : {_fmt_pct(prob_buy)}")
-    print(f"Prob SELL        : {_fmt_pct(prob_sell)}")
-    print(f"Recomendação     : {recomendacao}")
-    print(f"Confiança        : {confianca}")
-    print("═" * 70)
+    lines = [
+        "",
+        _SEP,
+        f"🕒 {now} | {symbol} | MODO: {modo}",
+        _SEP_THIN,
+        f"Tendência H1     : {tendencia_h1}",
+        f"Pullback M15     : {pullback_m15}",
+        f"ATR M15          : {_fmt6(atr_m15)}",
+        f"Status Entrada   : {status_entrada}",
+        f"Posição Aberta   : {'SIM' if posicao_aberta else 'NÃO'}",
+        f"Trades Hoje      : {trades_hoje}",
+        f"PnL Hoje         : {_fmt2(pnl_hoje)}",
+        f"Drawdown Dia     : {_fmt2(drawdown_dia)}",
+        _SEP_THIN,
+        f"Score            : {_fmt0(score)}/100",
+        f"Prob BUY         : {_fmt_pct(prob_buy)}",
+        f"Prob SELL        : {_fmt_pct(prob_sell)}",
+        f"Recomendação     : {recomendacao}",
+        f"Confiança        : {confianca}",
+        _SEP,
+    ]
+    # Uma única escrita no stdout por render
+    sys.stdout.write("\n".join(lines) + "\n")
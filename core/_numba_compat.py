@@ -0,0 +1,20 @@
+"""
+Compatibilidade opcional com Numba.
+Sem Numba instalado, njit devolve a função Python original e prange = range.
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_ENABLED = True
+except ImportError:
+    NUMBA_ENABLED = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """Fallback sem Numba: devolve a função Python original."""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+__all__ = ["njit", "prange", "NUMBA_ENABLED"]
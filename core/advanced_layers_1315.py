@@ -6,7 +6,7 @@ O bot usa múltiplas estratégias especializadas por regime.
 """
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
 import numpy as np
 from core.logger import get_logger
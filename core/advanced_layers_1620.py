@@ -5,7 +5,7 @@ CAMADA 16: INTELIGÊNCIA DE COMPORTAMENTO DE MULTIDÃO
 O bot identifica excesso emocional do mercado.
 """
 
-from typing import Dict
+from typing import Callable, Dict, Tuple
 import numpy as np
 from core.logger import get_logger
 
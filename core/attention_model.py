@@ -12,6 +12,26 @@ import numpy as np
 from core.logger import get_logger
 
 
+# Multiplicadores por regime de sessão (componentes ausentes = 1.0)
+_SESSION_ADJUSTMENTS = {
+    "calm_session": {
+        "trend_alignment": 1.10,
+        "session_quality": 1.30,
+        "volatility_regime": 0.80
+    },
+    "volatile_session": {
+        "volatility_regime": 1.40,
+        "session_quality": 0.70,
+        "trend_alignment": 0.90
+    }
+}
+
+_DEFAULT_SESSION_ADJUSTMENT = {key: 1.0 for key in [
+    "trend_alignment", "momentum_strength", "support_resistance",
+    "volatility_regime", "session_quality", "liquidity", "volume_confirmation"
+]}
+
+
 class AttentionFocus(Enum):
     """Focos de atenção do bot"""
     TREND_FOLLOWING = "trend"
@@ -101,6 +121,9 @@ class ContextualAttentionModel:
             }
         }
         
+        # Pesos normalizados por (regime, sessão, perfil base)
+        self._weights_cache: Dict[tuple, Dict[str, float]] = {}
+        
         # Foco atual
         self.current_focus = AttentionFocus.TREND_FOLLOWING
         self.current_weights = AttentionWeights(**self.attention_profiles["strong_trend"])
@@ -165,18 +188,24 @@ class ContextualAttentionModel:
         else:
             base_profile = self.attention_profiles["strong_trend"]
         
-        # Ajustar por sessão
-        session_adjustment = self._get_session_adjustment(session_regime)
-        
-        # Mesclar
-        weights_dict = {}
-        for key, value in base_profile.items():
-            adjustment = session_adjustment.get(key, 1.0)
-            weights_dict[key] = value * adjustment
-        
-        # Normalizar
-        total = sum(weights_dict.values())
-        weights_dict = {k: v/total for k, v in weights_dict.items()}
+        # Perfil entra na chave: edições em attention_profiles não usam cache velho
+        cache_key = (session_regime, tuple(base_profile.items()))
+        weights_dict = self._weights_cache.get(cache_key)
+        
+        if weights_dict is None:
+            # Ajustar por sessão
+            session_adjustment = self._get_session_adjustment(session_regime)
+            
+            # Mesclar
+            weights_dict = {}
+            for key, value in base_profile.items():
+                adjustment = session_adjustment.get(key, 1.0)
+                weights_dict[key] = value * adjustment
+            
+            # Normalizar
+            total = sum(weights_dict.values())
+            weights_dict = {k: v/total for k, v in weights_dict.items()}
+            self._weights_cache[cache_key] = weights_dict
         
         self.current_weights = AttentionWeights(**weights_dict)
         
@@ -184,25 +213,7 @@ class ContextualAttentionModel:
     
     def _get_session_adjustment(self, session_regime: str) -> Dict:
         """Ajustes por tipo de sessão"""
-        adjustments = {
-            "calm_session": {
-                "trend_alignment": 1.10,
-                "session_quality": 1.30,
-                "volatility_regime": 0.80
-            },
-            "volatile_session": {
-                "volatility_regime": 1.40,
-                "session_quality": 0.70,
-                "trend_alignment": 0.90
-            }
-        }
-        
-        default_adj = {key: 1.0 for key in [
-            "trend_alignment", "momentum_strength", "support_resistance",
-            "volatility_regime", "session_quality", "liquidity", "volume_confirmation"
-        ]}
-        
-        return adjustments.get(session_regime, default_adj)
+        return _SESSION_ADJUSTMENTS.get(session_regime, _DEFAULT_SESSION_ADJUSTMENT)
     
     def prioritize_signals(self, available_signals: Dict) -> List[tuple]:
         """
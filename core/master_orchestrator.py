@@ -165,7 +165,9 @@ class MasterOrchestrator:
             # Verificar risco
             can_trade, risk_reason = self.risk_manager.can_trade()
             if not can_trade:
-                return self._create_blocked_context(f"Risk blocked: {risk_reason}", market_data)
+                return self._create_blocked_context(
+                    f"Risk blocked: {self.risk_manager.describe_reason(risk_reason)}", market_data
+                )
             
             # Verificar modo seguro
             if self.resilience_engine.should_activate_safe_mode():
@@ -420,8 +422,8 @@ class MasterOrchestrator:
     def _prepare_risk_analysis(self) -> Dict:
         """Prepara análise de risco"""
         return {
-            "current_drawdown_pct": self.risk_manager.state.get("current_drawdown_pct", 0),
-            "exposure_pct": self.risk_manager.state.get("current_exposure_pct", 0),
+            "current_drawdown_pct": self.risk_manager.state.current_drawdown_pct,
+            "exposure_pct": self.risk_manager.state.current_exposure_pct,
             "potential_profit": 100,
             "potential_loss": 50
         }
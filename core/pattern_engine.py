@@ -6,12 +6,18 @@ Identifica padrões técnicos, formações de candles, suporte/resistência
 e valida qualidade de sinais para trading profissional.
 """
 
+import weakref
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, NamedTuple, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from core._numba_compat import njit, NUMBA_ENABLED
+
 
 class CandlePattern(Enum):
     ENGULFING_BULLISH = "ENGULFING_BULLISH"
@@ -43,6 +49,180 @@ class ChartPattern(Enum):
     NONE = "NONE"
 
 
+class Candles(NamedTuple):
+    """Colunas OHLCV de um timeframe em layout SoA (struct-of-arrays)."""
+    block: np.ndarray  # (N, 5) float64 C-contíguo: open, high, low, close, volume
+    o: np.ndarray      # views de colunas do block
+    h: np.ndarray
+    l: np.ndarray
+    c: np.ndarray
+    v: np.ndarray      # zeros quando o DataFrame não tem coluna 'volume'
+    has_volume: bool
+
+
+def _to_candles(df: pd.DataFrame) -> Candles:
+    """Extrai OHLCV do DataFrame uma única vez como bloco float64 contíguo."""
+    has_volume = 'volume' in df.columns
+    
+    if has_volume:
+        block = np.ascontiguousarray(
+            df[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+        )
+    else:
+        block = np.zeros((len(df), 5), dtype=np.float64)
+        block[:, :4] = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+    
+    return Candles(block, block[:, 0], block[:, 1], block[:, 2], block[:, 3], block[:, 4], has_volume)
+
+
+class DetectionContext(NamedTuple):
+    """
+    Dados de uma única chamada de detect_all_patterns, passados como
+    argumento em vez de atributos temporários do PatternEngine.
+    """
+    frames: Dict[int, Candles]                  # id(df) -> Candles dos DataFrames da chamada
+    h1_trend: Optional[str]                     # tendência H1 calculada uma vez
+
+
+# Número máximo de DataFrames com EMA/média de volume em cache
+_CACHE_SLOTS = 8
+
+# Padrões de candle na ordem dos bits da máscara retornada por
+# _eval_candle_patterns: (padrão, direção, força fixa, confiança).
+# Força None = força contextual calculada pelo kernel.
+_CANDLE_SPECS = (
+    (CandlePattern.ENGULFING_BULLISH, "BULLISH", None, 75),
+    (CandlePattern.ENGULFING_BEARISH, "BEARISH", None, 75),
+    (CandlePattern.HAMMER, "BULLISH", 65, 60),
+    (CandlePattern.SHOOTING_STAR, "BEARISH", 65, 60),
+    (CandlePattern.DOJI, "NEUTRAL", 50, 70),
+    (CandlePattern.PIN_BAR_BULLISH, "BULLISH", 70, 65),
+    (CandlePattern.PIN_BAR_BEARISH, "BEARISH", 70, 65),
+    (CandlePattern.THREE_WHITE_SOLDIERS, "BULLISH", 85, 80),
+    (CandlePattern.THREE_BLACK_CROWS, "BEARISH", 85, 80),
+)
+
+
+@njit(cache=True, fastmath=True)
+def _eval_candle_patterns(block, has_volume):
+    """
+    Avalia todos os padrões de candle das últimas barras em uma passada
+    sobre o bloco OHLCV (N, 5).
+
+    Returns:
+        (máscara de bits na ordem de _CANDLE_SPECS, força contextual)
+    """
+    o = block[:, 0]
+    h = block[:, 1]
+    l = block[:, 2]
+    c = block[:, 3]
+    v = block[:, 4]
+    n = c.shape[0]
+    mask = 0
+
+    # Última barra
+    o1 = o[n - 1]
+    c1 = c[n - 1]
+    body = abs(c1 - o1)
+    total_range = h[n - 1] - l[n - 1]
+    lower_shadow = min(o1, c1) - l[n - 1]
+    upper_shadow = h[n - 1] - max(o1, c1)
+
+    # Barras anteriores
+    o2 = o[n - 2]
+    c2 = c[n - 2]
+    o3 = o[n - 3]
+    c3 = c[n - 3]
+
+    # Engulfing
+    if c2 < o2 and c1 > o1 and o1 < c2 and c1 > o2:
+        mask |= 1
+    if c2 > o2 and c1 < o1 and o1 > c2 and c1 < o2:
+        mask |= 2
+
+    # Hammer / Shooting Star
+    if lower_shadow > body * 2 and upper_shadow < body * 0.5 and body > 0:
+        mask |= 4
+    if upper_shadow > body * 2 and lower_shadow < body * 0.5 and body > 0:
+        mask |= 8
+
+    if total_range > 0:
+        # Doji
+        if body / total_range < 0.05:
+            mask |= 16
+        # Pin Bars
+        if lower_shadow / total_range > 0.6 and c1 > o1:
+            mask |= 32
+        if upper_shadow / total_range > 0.6 and c1 < o1:
+            mask |= 64
+
+    # Three White Soldiers / Three Black Crows (bodies consistentes)
+    body3 = abs(c3 - o3)
+    body2 = abs(c2 - o2)
+    min_body = (body3 + body2 + body) / 3 * 0.7
+    if body3 > min_body and body2 > min_body and body > min_body:
+        if c3 > o3 and c2 > o2 and c1 > o1 and c3 < c2 < c1:
+            mask |= 128
+        if c3 < o3 and c2 < o2 and c1 < o1 and c3 > c2 > c1:
+            mask |= 256
+
+    # Força contextual (body ratio + spike de volume)
+    strength = 50.0
+    if total_range > 0:
+        strength += body / total_range * 30
+    if has_volume:
+        window = min(n, 20)
+        vol_sum = 0.0
+        for i in range(n - window, n):
+            vol_sum += v[i]
+        if v[n - 1] > vol_sum / window * 1.5:
+            strength += 20
+
+    return mask, min(100.0, max(0.0, strength))
+
+
+@njit(cache=True)
+def _ema_state(values, decay):
+    """
+    Numerador e denominador da EMA ajustada (pandas ewm, adjust=True)
+    sobre `values`, em recursão sem alocar a série completa.
+    """
+    num = 0.0
+    den = 0.0
+    for i in range(values.shape[0]):
+        num = values[i] + decay * num
+        den = 1.0 + decay * den
+    return num, den
+
+
+@lru_cache(maxsize=16)
+def _extrema_kernel(order: int, is_peak: bool):
+    """
+    Kernel Numba de topos (is_peak) ou fundos especializado para um `order`
+    fixo: o JIT trata `order` como constante e desenrola as comparações.
+    Um kernel compilado por (order, is_peak) visto.
+    """
+    @njit
+    def kernel(values):
+        n = values.shape[0]
+        out = np.zeros(n, np.bool_)
+        for i in range(order, n - order):
+            center = values[i]
+            ok = True
+            for j in range(1, order + 1):
+                if is_peak:
+                    if values[i - j] > center or values[i + j] > center:
+                        ok = False
+                        break
+                elif values[i - j] < center or values[i + j] < center:
+                    ok = False
+                    break
+            out[i] = ok
+        return out
+    
+    return kernel
+
+
 @dataclass
 class PatternSignal:
     pattern_type: str
@@ -66,6 +246,12 @@ class PatternEngine:
         self.detected_patterns = []
         self.pattern_history = []
         
+        # Caches incrementais por DataFrame: id(df) -> (weakref(df), len,
+        # último valor, ...). O id só vale enquanto o weakref aponta para o
+        # mesmo objeto (o CPython reutiliza ids de frames já liberados)
+        self._ema_cache: Dict[int, Tuple[weakref.ref, int, float, float, float]] = {}
+        self._volume_cache: Dict[int, Tuple[weakref.ref, int, float, float]] = {}
+        
     def detect_all_patterns(
         self,
         df_m15: pd.DataFrame,
@@ -80,30 +266,37 @@ class PatternEngine:
             Dict com todos os padrões detectados e análise
         """
         
+        # Extração OHLCV única por timeframe, reutilizada por todas as análises
+        frames = {id(df): _to_candles(df) for df in (df_m15, df_h1, df_h4)}
+        
+        # Tendência H1 usada por pullback/continuação/reversão: calculada uma vez
+        h1_trend = self._get_trend_direction(df_h1, DetectionContext(frames, None))
+        ctx = DetectionContext(frames, h1_trend)
+        
         patterns = {
             "candle_patterns": {
-                "m15": self._detect_candle_patterns(df_m15),
-                "h1": self._detect_candle_patterns(df_h1),
-                "h4": self._detect_candle_patterns(df_h4)
+                "m15": self._detect_candle_patterns(df_m15, ctx),
+                "h1": self._detect_candle_patterns(df_h1, ctx),
+                "h4": self._detect_candle_patterns(df_h4, ctx)
             },
             
             "chart_patterns": {
-                "h1": self._detect_chart_patterns(df_h1),
-                "h4": self._detect_chart_patterns(df_h4)
+                "h1": self._detect_chart_patterns(df_h1, ctx),
+                "h4": self._detect_chart_patterns(df_h4, ctx)
             },
             
             "support_resistance": support_resistance,
             
             "price_action": {
-                "m15": self._analyze_price_action(df_m15),
-                "h1": self._analyze_price_action(df_h1)
+                "m15": self._analyze_price_action(df_m15, ctx),
+                "h1": self._analyze_price_action(df_h1, ctx)
             },
             
-            "breakout_signals": self._detect_breakouts(df_h1, support_resistance),
+            "breakout_signals": self._detect_breakouts(df_h1, support_resistance, ctx),
             
-            "reversal_signals": self._detect_reversals(df_m15, df_h1),
+            "reversal_signals": self._detect_reversals(df_m15, df_h1, ctx),
             
-            "continuation_signals": self._detect_continuations(df_m15, df_h1)
+            "continuation_signals": self._detect_continuations(df_m15, df_h1, ctx)
         }
         
         # Score agregado de qualidade dos padrões
@@ -114,264 +307,197 @@ class PatternEngine:
         
         return patterns
     
-    def _detect_candle_patterns(self, df: pd.DataFrame) -> List[Dict]:
+    @staticmethod
+    def _candles(df: pd.DataFrame, ctx: Optional[DetectionContext] = None) -> Candles:
+        """
+        Candles SoA do DataFrame (extraídos uma vez por detect_all_patterns).
+        """
+        candles = ctx.frames.get(id(df)) if ctx is not None else None
+        if candles is None:
+            candles = _to_candles(df)
+        return candles
+    
+    def _detect_candle_patterns(self, df: pd.DataFrame, ctx: Optional[DetectionContext] = None) -> List[Dict]:
         """
         Detecta padrões de candles (última barra e combinações).
         """
         if len(df) < 5:
             return []
         
-        patterns = []
-        
-        # Engulfing Bullish
-        if self._is_engulfing_bullish(df):
-            patterns.append({
-                "type": CandlePattern.ENGULFING_BULLISH.value,
-                "direction": "BULLISH",
-                "strength": self._calculate_candle_pattern_strength(df, "ENGULFING"),
-                "confidence": 75
-            })
-        
-        # Engulfing Bearish
-        if self._is_engulfing_bearish(df):
-            patterns.append({
-                "type": CandlePattern.ENGULFING_BEARISH.value,
-                "direction": "BEARISH",
-                "strength": self._calculate_candle_pattern_strength(df, "ENGULFING"),
-                "confidence": 75
-            })
-        
-        # Hammer (bullish reversal)
-        if self._is_hammer(df):
-            patterns.append({
-                "type": CandlePattern.HAMMER.value,
-                "direction": "BULLISH",
-                "strength": 65,
-                "confidence": 60
-            })
-        
-        # Shooting Star (bearish reversal)
-        if self._is_shooting_star(df):
-            patterns.append({
-                "type": CandlePattern.SHOOTING_STAR.value,
-                "direction": "BEARISH",
-                "strength": 65,
-                "confidence": 60
-            })
-        
-        # Doji (indecisão)
-        if self._is_doji(df):
-            patterns.append({
-                "type": CandlePattern.DOJI.value,
-                "direction": "NEUTRAL",
-                "strength": 50,
-                "confidence": 70
-            })
-        
-        # Pin Bar Bullish
-        if self._is_pin_bar_bullish(df):
-            patterns.append({
-                "type": CandlePattern.PIN_BAR_BULLISH.value,
-                "direction": "BULLISH",
-                "strength": 70,
-                "confidence": 65
-            })
-        
-        # Pin Bar Bearish
-        if self._is_pin_bar_bearish(df):
-            patterns.append({
-                "type": CandlePattern.PIN_BAR_BEARISH.value,
-                "direction": "BEARISH",
-                "strength": 70,
-                "confidence": 65
-            })
-        
-        # Three White Soldiers
-        if self._is_three_white_soldiers(df):
-            patterns.append({
-                "type": CandlePattern.THREE_WHITE_SOLDIERS.value,
-                "direction": "BULLISH",
-                "strength": 85,
-                "confidence": 80
-            })
+        candles = self._candles(df, ctx)
+        if NUMBA_ENABLED:
+            mask, strength = _eval_candle_patterns(candles.block, candles.has_volume)
+        else:
+            mask, strength = self._eval_candle_patterns_py(df, ctx)
         
-        # Three Black Crows
-        if self._is_three_black_crows(df):
-            patterns.append({
-                "type": CandlePattern.THREE_BLACK_CROWS.value,
-                "direction": "BEARISH",
-                "strength": 85,
-                "confidence": 80
-            })
+        patterns = []
+        for bit, (pattern, direction, fixed_strength, confidence) in enumerate(_CANDLE_SPECS):
+            if mask & (1 << bit):
+                patterns.append({
+                    "type": pattern.value,
+                    "direction": direction,
+                    "strength": strength if fixed_strength is None else fixed_strength,
+                    "confidence": confidence
+                })
         
         return patterns
     
-    def _is_engulfing_bullish(self, df: pd.DataFrame) -> bool:
-        """Verifica padrão Engulfing Bullish."""
-        if len(df) < 2:
-            return False
+    def _eval_candle_patterns_py(self, df: pd.DataFrame,
+                                 ctx: Optional[DetectionContext] = None) -> Tuple[int, float]:
+        """
+        Fallback Python de _eval_candle_patterns (sem Numba).
+        """
+        # Uma única extração das últimas barras; predicados sem acesso pandas
+        last_three = self._candles(df, ctx).block[-3:, :4]
+        prev, curr = last_three[1:].tolist()
+        
+        matches = (
+            self._is_engulfing_bullish(prev, curr),
+            self._is_engulfing_bearish(prev, curr),
+            self._is_hammer(curr),
+            self._is_shooting_star(curr),
+            self._is_doji(curr),
+            self._is_pin_bar_bullish(curr),
+            self._is_pin_bar_bearish(curr),
+            self._is_three_white_soldiers(last_three),
+            self._is_three_black_crows(last_three)
+        )
+        
+        mask = 0
+        for bit, matched in enumerate(matches):
+            if matched:
+                mask |= 1 << bit
         
-        prev = df.iloc[-2]
-        curr = df.iloc[-1]
+        return mask, self._calculate_candle_pattern_strength(df, "ENGULFING", ctx)
+    
+    def _is_engulfing_bullish(self, prev: Tuple, curr: Tuple) -> bool:
+        """Verifica padrão Engulfing Bullish em (open, high, low, close)."""
+        prev_open, _, _, prev_close = prev
+        curr_open, _, _, curr_close = curr
         
         # Candle anterior bearish, atual bullish e envolve o anterior
-        prev_bearish = prev['close'] < prev['open']
-        curr_bullish = curr['close'] > curr['open']
-        engulfing = curr['open'] < prev['close'] and curr['close'] > prev['open']
+        prev_bearish = prev_close < prev_open
+        curr_bullish = curr_close > curr_open
+        engulfing = curr_open < prev_close and curr_close > prev_open
         
         return prev_bearish and curr_bullish and engulfing
     
-    def _is_engulfing_bearish(self, df: pd.DataFrame) -> bool:
-        """Verifica padrão Engulfing Bearish."""
-        if len(df) < 2:
-            return False
-        
-        prev = df.iloc[-2]
-        curr = df.iloc[-1]
+    def _is_engulfing_bearish(self, prev: Tuple, curr: Tuple) -> bool:
+        """Verifica padrão Engulfing Bearish em (open, high, low, close)."""
+        prev_open, _, _, prev_close = prev
+        curr_open, _, _, curr_close = curr
         
         # Candle anterior bullish, atual bearish e envolve o anterior
-        prev_bullish = prev['close'] > prev['open']
-        curr_bearish = curr['close'] < curr['open']
-        engulfing = curr['open'] > prev['close'] and curr['close'] < prev['open']
+        prev_bullish = prev_close > prev_open
+        curr_bearish = curr_close < curr_open
+        engulfing = curr_open > prev_close and curr_close < prev_open
         
         return prev_bullish and curr_bearish and engulfing
     
-    def _is_hammer(self, df: pd.DataFrame) -> bool:
+    def _is_hammer(self, candle: Tuple) -> bool:
         """Verifica padrão Hammer."""
-        if len(df) < 1:
-            return False
+        open_, high, low, close = candle
         
-        candle = df.iloc[-1]
-        
-        body = abs(candle['close'] - candle['open'])
-        lower_shadow = min(candle['open'], candle['close']) - candle['low']
-        upper_shadow = candle['high'] - max(candle['open'], candle['close'])
+        body = abs(close - open_)
+        lower_shadow = min(open_, close) - low
+        upper_shadow = high - max(open_, close)
         
         # Lower shadow > 2x body e upper shadow pequena
         return (lower_shadow > body * 2 and 
                 upper_shadow < body * 0.5 and
                 body > 0)
     
-    def _is_shooting_star(self, df: pd.DataFrame) -> bool:
+    def _is_shooting_star(self, candle: Tuple) -> bool:
         """Verifica padrão Shooting Star."""
-        if len(df) < 1:
-            return False
-        
-        candle = df.iloc[-1]
+        open_, high, low, close = candle
         
-        body = abs(candle['close'] - candle['open'])
-        lower_shadow = min(candle['open'], candle['close']) - candle['low']
-        upper_shadow = candle['high'] - max(candle['open'], candle['close'])
+        body = abs(close - open_)
+        lower_shadow = min(open_, close) - low
+        upper_shadow = high - max(open_, close)
         
         # Upper shadow > 2x body e lower shadow pequena
         return (upper_shadow > body * 2 and 
                 lower_shadow < body * 0.5 and
                 body > 0)
     
-    def _is_doji(self, df: pd.DataFrame) -> bool:
+    def _is_doji(self, candle: Tuple) -> bool:
         """Verifica padrão Doji."""
-        if len(df) < 1:
-            return False
-        
-        candle = df.iloc[-1]
+        open_, high, low, close = candle
         
-        body = abs(candle['close'] - candle['open'])
-        total_range = candle['high'] - candle['low']
+        body = abs(close - open_)
+        total_range = high - low
         
         # Body muito pequeno (<5% do range total)
         return total_range > 0 and (body / total_range) < 0.05
     
-    def _is_pin_bar_bullish(self, df: pd.DataFrame) -> bool:
+    def _is_pin_bar_bullish(self, candle: Tuple) -> bool:
         """Verifica Pin Bar Bullish."""
-        if len(df) < 1:
-            return False
-        
-        candle = df.iloc[-1]
+        open_, high, low, close = candle
         
-        body = abs(candle['close'] - candle['open'])
-        lower_shadow = min(candle['open'], candle['close']) - candle['low']
-        upper_shadow = candle['high'] - max(candle['open'], candle['close'])
-        total_range = candle['high'] - candle['low']
+        lower_shadow = min(open_, close) - low
+        total_range = high - low
         
         # Lower wick > 60% do range total
         return (total_range > 0 and 
                 lower_shadow / total_range > 0.6 and
-                candle['close'] > candle['open'])
+                close > open_)
     
-    def _is_pin_bar_bearish(self, df: pd.DataFrame) -> bool:
+    def _is_pin_bar_bearish(self, candle: Tuple) -> bool:
         """Verifica Pin Bar Bearish."""
-        if len(df) < 1:
-            return False
+        open_, high, low, close = candle
         
-        candle = df.iloc[-1]
-        
-        body = abs(candle['close'] - candle['open'])
-        lower_shadow = min(candle['open'], candle['close']) - candle['low']
-        upper_shadow = candle['high'] - max(candle['open'], candle['close'])
-        total_range = candle['high'] - candle['low']
+        upper_shadow = high - max(open_, close)
+        total_range = high - low
         
         # Upper wick > 60% do range total
         return (total_range > 0 and 
                 upper_shadow / total_range > 0.6 and
-                candle['close'] < candle['open'])
+                close < open_)
     
-    def _is_three_white_soldiers(self, df: pd.DataFrame) -> bool:
-        """Verifica padrão Three White Soldiers."""
-        if len(df) < 3:
-            return False
-        
-        last_three = df.tail(3)
+    def _is_three_white_soldiers(self, last_three: np.ndarray) -> bool:
+        """Verifica padrão Three White Soldiers (array 3x4 OHLC)."""
+        o3 = last_three[:, 0]
+        c3 = last_three[:, 3]
         
         # Três candles bullish consecutivos
-        all_bullish = all(row['close'] > row['open'] for _, row in last_three.iterrows())
-        
-        if not all_bullish:
+        if not (c3 > o3).all():
             return False
         
         # Cada close maior que o anterior
-        closes = last_three['close'].values
-        sequential_higher = all(closes[i] > closes[i-1] for i in range(1, len(closes)))
+        if not (np.diff(c3) > 0).all():
+            return False
         
         # Bodies similares (não muito pequenos)
-        bodies = [abs(row['close'] - row['open']) for _, row in last_three.iterrows()]
-        avg_body = sum(bodies) / len(bodies)
-        consistent_bodies = all(b > avg_body * 0.7 for b in bodies)
-        
-        return sequential_higher and consistent_bodies
+        bodies = np.abs(c3 - o3)
+        return bool((bodies > bodies.mean() * 0.7).all())
     
-    def _is_three_black_crows(self, df: pd.DataFrame) -> bool:
-        """Verifica padrão Three Black Crows."""
-        if len(df) < 3:
-            return False
-        
-        last_three = df.tail(3)
+    def _is_three_black_crows(self, last_three: np.ndarray) -> bool:
+        """Verifica padrão Three Black Crows (array 3x4 OHLC)."""
+        o3 = last_three[:, 0]
+        c3 = last_three[:, 3]
         
         # Três candles bearish consecutivos
-        all_bearish = all(row['close'] < row['open'] for _, row in last_three.iterrows())
-        
-        if not all_bearish:
+        if not (c3 < o3).all():
             return False
         
         # Cada close menor que o anterior
-        closes = last_three['close'].values
-        sequential_lower = all(closes[i] < closes[i-1] for i in range(1, len(closes)))
+        if not (np.diff(c3) < 0).all():
+            return False
         
         # Bodies similares (não muito pequenos)
-        bodies = [abs(row['close'] - row['open']) for _, row in last_three.iterrows()]
-        avg_body = sum(bodies) / len(bodies)
-        consistent_bodies = all(b > avg_body * 0.7 for b in bodies)
-        
-        return sequential_lower and consistent_bodies
+        bodies = np.abs(c3 - o3)
+        return bool((bodies > bodies.mean() * 0.7).all())
     
-    def _calculate_candle_pattern_strength(self, df: pd.DataFrame, pattern_type: str) -> float:
+    def _calculate_candle_pattern_strength(self, df: pd.DataFrame, pattern_type: str,
+                                           ctx: Optional[DetectionContext] = None) -> float:
         """
         Calcula força do padrão de candle com base em contexto.
         """
         strength = 50.0
         
-        candle = df.iloc[-1]
-        body = abs(candle['close'] - candle['open'])
-        total_range = candle['high'] - candle['low']
+        candles = self._candles(df, ctx)
+        body = abs(candles.c[-1] - candles.o[-1])
+        total_range = candles.h[-1] - candles.l[-1]
         
         # Body ratio
         if total_range > 0:
@@ -380,14 +506,14 @@ class PatternEngine:
         
         # Volume (se disponível)
         if 'volume' in df.columns:
-            avg_vol = df['volume'].tail(20).mean()
-            curr_vol = candle['volume']
+            avg_vol = self._volume_mean(df, ctx=ctx)
+            curr_vol = candles.v[-1]
             if curr_vol > avg_vol * 1.5:
                 strength += 20
         
         return min(100, max(0, strength))
     
-    def _detect_chart_patterns(self, df: pd.DataFrame) -> List[Dict]:
+    def _detect_chart_patterns(self, df: pd.DataFrame, ctx: Optional[DetectionContext] = None) -> List[Dict]:
         """
         Detecta padrões de gráfico (formações de preço).
         """
@@ -396,42 +522,55 @@ class PatternEngine:
         if len(df) < 50:
             return patterns
         
+        # Views float64 do bloco SoA (sem cópia por timeframe)
+        candles = self._candles(df, ctx)
+        highs = candles.h
+        lows = candles.l
+        
+        # Topos/fundos calculados uma vez e compartilhados pelos detectores
+        peaks5 = self._find_peaks(highs, order=5)
+        troughs5 = self._find_troughs(lows, order=5)
+        highs30, lows30 = highs[-30:], lows[-30:]
+        peaks3 = self._find_peaks(highs30, order=3)
+        troughs3 = self._find_troughs(lows30, order=3)
+        
         # Double Top
-        double_top = self._detect_double_top(df)
+        double_top = self._detect_double_top(df, highs, peaks5, ctx)
         if double_top:
             patterns.append(double_top)
         
         # Double Bottom
-        double_bottom = self._detect_double_bottom(df)
+        double_bottom = self._detect_double_bottom(df, lows, troughs5, ctx)
         if double_bottom:
             patterns.append(double_bottom)
         
         # Triangles
-        triangle = self._detect_triangle(df)
+        triangle = self._detect_triangle(highs30[peaks3], lows30[troughs3])
         if triangle:
             patterns.append(triangle)
         
-        # Channels
-        channel = self._detect_channel(df)
+        # Channels: picos de ordem 5 dentro das últimas 50 barras (mesmos
+        # que seriam encontrados buscando apenas na janela)
+        recent = len(highs) - 50 + 5
+        channel = self._detect_channel(highs[peaks5[peaks5 >= recent]], lows[troughs5[troughs5 >= recent]])
         if channel:
             patterns.append(channel)
         
         return patterns
     
-    def _detect_double_top(self, df: pd.DataFrame) -> Optional[Dict]:
+    def _detect_double_top(self, df: pd.DataFrame, highs: np.ndarray, peaks: np.ndarray,
+                           ctx: Optional[DetectionContext] = None) -> Optional[Dict]:
         """
-        Detecta padrão Double Top.
+        Detecta padrão Double Top a partir dos índices de picos (ordem 5).
         """
-        highs = self._find_peaks(df['high'], order=5)
-        
-        if len(highs) < 2:
+        if len(peaks) < 2:
             return None
         
         # Últimos dois topos
-        last_two_highs = highs[-2:]
+        first, last = highs[peaks[-2]], highs[peaks[-1]]
         
         # Topos em níveis similares (±2%)
-        diff = abs(last_two_highs[0][1] - last_two_highs[1][1]) / last_two_highs[0][1]
+        diff = abs(first - last) / first
         
         if diff < 0.02:
             return {
@@ -439,25 +578,24 @@ class PatternEngine:
                 "direction": "BEARISH",
                 "strength": 75,
                 "confidence": 70,
-                "target": self._calculate_pattern_target(df, "DOUBLE_TOP", last_two_highs)
+                "target": self._calculate_pattern_target(df, "DOUBLE_TOP", peaks[-2], ctx)
             }
         
         return None
     
-    def _detect_double_bottom(self, df: pd.DataFrame) -> Optional[Dict]:
+    def _detect_double_bottom(self, df: pd.DataFrame, lows: np.ndarray, troughs: np.ndarray,
+                              ctx: Optional[DetectionContext] = None) -> Optional[Dict]:
         """
-        Detecta padrão Double Bottom.
+        Detecta padrão Double Bottom a partir dos índices de fundos (ordem 5).
         """
-        lows = self._find_troughs(df['low'], order=5)
-        
-        if len(lows) < 2:
+        if len(troughs) < 2:
             return None
         
         # Últimos dois fundos
-        last_two_lows = lows[-2:]
+        first, last = lows[troughs[-2]], lows[troughs[-1]]
         
         # Fundos em níveis similares (±2%)
-        diff = abs(last_two_lows[0][1] - last_two_lows[1][1]) / last_two_lows[0][1]
+        diff = abs(first - last) / first
         
         if diff < 0.02:
             return {
@@ -465,30 +603,22 @@ class PatternEngine:
                 "direction": "BULLISH",
                 "strength": 75,
                 "confidence": 70,
-                "target": self._calculate_pattern_target(df, "DOUBLE_BOTTOM", last_two_lows)
+                "target": self._calculate_pattern_target(df, "DOUBLE_BOTTOM", troughs[-2], ctx)
             }
         
         return None
     
-    def _detect_triangle(self, df: pd.DataFrame) -> Optional[Dict]:
+    def _detect_triangle(self, peak_values: np.ndarray, trough_values: np.ndarray) -> Optional[Dict]:
         """
-        Detecta padrões de triângulo (ascending, descending, symmetrical).
+        Detecta padrões de triângulo (ascending, descending, symmetrical)
+        a partir dos topos/fundos (ordem 3) das últimas 30 barras.
         """
-        if len(df) < 30:
-            return None
-        
-        recent_data = df.tail(30)
-        
-        # Topos e fundos
-        highs = self._find_peaks(recent_data['high'], order=3)
-        lows = self._find_troughs(recent_data['low'], order=3)
-        
-        if len(highs) < 2 or len(lows) < 2:
+        if len(peak_values) < 2 or len(trough_values) < 2:
             return None
         
         # Slopes
-        high_slope = self._calculate_slope([h[1] for h in highs])
-        low_slope = self._calculate_slope([l[1] for l in lows])
+        high_slope = self._calculate_slope(peak_values)
+        low_slope = self._calculate_slope(trough_values)
         
         # Ascending Triangle (topos planos, fundos subindo)
         if abs(high_slope) < 0.0005 and low_slope > 0.001:
@@ -519,24 +649,17 @@ class PatternEngine:
         
         return None
     
-    def _detect_channel(self, df: pd.DataFrame) -> Optional[Dict]:
+    def _detect_channel(self, peak_values: np.ndarray, trough_values: np.ndarray) -> Optional[Dict]:
         """
-        Detecta canais de preço.
+        Detecta canais de preço a partir dos topos/fundos (ordem 5)
+        das últimas 50 barras.
         """
-        if len(df) < 50:
+        if len(peak_values) < 3 or len(trough_values) < 3:
             return None
         
-        recent_data = df.tail(50)
-        
         # Linear regression nos topos e fundos
-        highs = self._find_peaks(recent_data['high'], order=5)
-        lows = self._find_troughs(recent_data['low'], order=5)
-        
-        if len(highs) < 3 or len(lows) < 3:
-            return None
-        
-        high_slope = self._calculate_slope([h[1] for h in highs])
-        low_slope = self._calculate_slope([l[1] for l in lows])
+        high_slope = self._calculate_slope(peak_values)
+        low_slope = self._calculate_slope(trough_values)
         
         # Channel Up
         if high_slope > 0.001 and low_slope > 0.001:
@@ -562,29 +685,29 @@ class PatternEngine:
         
         return None
     
-    def _find_peaks(self, series: pd.Series, order: int = 5) -> List[Tuple[int, float]]:
+    def _find_peaks(self, values: np.ndarray, order: int = 5) -> np.ndarray:
         """
-        Encontra picos locais.
+        Encontra picos locais (índices >= aos `order` vizinhos de cada lado).
         """
-        peaks = []
-        for i in range(order, len(series) - order):
-            if all(series.iloc[i] >= series.iloc[i-j] for j in range(1, order+1)) and \
-               all(series.iloc[i] >= series.iloc[i+j] for j in range(1, order+1)):
-                peaks.append((i, series.iloc[i]))
-        return peaks
+        if NUMBA_ENABLED:
+            return np.flatnonzero(_extrema_kernel(order, True)(values))
+        if len(values) < 2 * order + 1:
+            return np.empty(0, dtype=np.intp)
+        windows = sliding_window_view(values, 2 * order + 1)
+        return np.flatnonzero((windows <= windows[:, order:order + 1]).all(axis=1)) + order
     
-    def _find_troughs(self, series: pd.Series, order: int = 5) -> List[Tuple[int, float]]:
+    def _find_troughs(self, values: np.ndarray, order: int = 5) -> np.ndarray:
         """
-        Encontra vales locais.
+        Encontra vales locais (índices <= aos `order` vizinhos de cada lado).
         """
-        troughs = []
-        for i in range(order, len(series) - order):
-            if all(series.iloc[i] <= series.iloc[i-j] for j in range(1, order+1)) and \
-               all(series.iloc[i] <= series.iloc[i+j] for j in range(1, order+1)):
-                troughs.append((i, series.iloc[i]))
-        return troughs
+        if NUMBA_ENABLED:
+            return np.flatnonzero(_extrema_kernel(order, False)(values))
+        if len(values) < 2 * order + 1:
+            return np.empty(0, dtype=np.intp)
+        windows = sliding_window_view(values, 2 * order + 1)
+        return np.flatnonzero((windows >= windows[:, order:order + 1]).all(axis=1)) + order
     
-    def _calculate_slope(self, values: List[float]) -> float:
+    def _calculate_slope(self, values: np.ndarray) -> float:
         """
         Calcula slope (inclinação) de uma série de valores.
         """
@@ -592,56 +715,49 @@ class PatternEngine:
             return 0.0
         
         x = np.arange(len(values))
-        y = np.array(values)
+        y = np.asarray(values, dtype=np.float64)
         
         slope = np.polyfit(x, y, 1)[0]
         return float(slope)
     
-    def _calculate_pattern_target(self, df: pd.DataFrame, pattern_type: str, points: List) -> float:
+    def _calculate_pattern_target(self, df: pd.DataFrame, pattern_type: str, level_index: int,
+                                  ctx: Optional[DetectionContext] = None) -> float:
         """
         Calcula target de preço baseado no padrão.
         """
-        current_price = df['close'].iloc[-1]
+        candles = self._candles(df, ctx)
+        current_price = candles.c[-1]
+        
+        # Mín./máx. das últimas 20 barras direto nas views do bloco
+        low_20 = candles.l[-20:].min()
+        high_20 = candles.h[-20:].max()
         
+        # Nível do padrão relido pelo índice
         if pattern_type == "DOUBLE_TOP":
-            height = points[0][1] - df['low'].tail(20).min()
+            height = candles.h[level_index] - low_20
             return current_price - height
         
         elif pattern_type == "DOUBLE_BOTTOM":
-            height = df['high'].tail(20).max() - points[0][1]
+            height = high_20 - candles.l[level_index]
             return current_price + height
         
         return current_price
     
-    def _analyze_price_action(self, df: pd.DataFrame) -> Dict:
+    def _analyze_price_action(self, df: pd.DataFrame, ctx: Optional[DetectionContext] = None) -> Dict:
         """
         Análise de price action pura.
         """
         if len(df) < 10:
             return {}
         
-        last_candles = df.tail(10)
-        
-        # Sequência de topos e fundos
-        highs_increasing = all(
-            last_candles['high'].iloc[i] >= last_candles['high'].iloc[i-1] 
-            for i in range(1, min(5, len(last_candles)))
-        )
-        
-        lows_increasing = all(
-            last_candles['low'].iloc[i] >= last_candles['low'].iloc[i-1] 
-            for i in range(1, min(5, len(last_candles)))
-        )
+        # Sequência de topos e fundos (5 primeiras barras das últimas 10)
+        # Um único np.diff sobre o bloco (5, 2) de highs/lows
+        steps = np.diff(self._candles(df, ctx).block[-10:-5, 1:3], axis=0)
+        increasing = (steps >= 0).all(axis=0)
+        decreasing = (steps <= 0).all(axis=0)
         
-        highs_decreasing = all(
-            last_candles['high'].iloc[i] <= last_candles['high'].iloc[i-1] 
-            for i in range(1, min(5, len(last_candles)))
-        )
-        
-        lows_decreasing = all(
-            last_candles['low'].iloc[i] <= last_candles['low'].iloc[i-1] 
-            for i in range(1, min(5, len(last_candles)))
-        )
+        highs_increasing, lows_increasing = bool(increasing[0]), bool(increasing[1])
+        highs_decreasing, lows_decreasing = bool(decreasing[0]), bool(decreasing[1])
         
         # Classificação
         if highs_increasing and lows_increasing:
@@ -663,7 +779,8 @@ class PatternEngine:
             "lows_decreasing": lows_decreasing
         }
     
-    def _detect_breakouts(self, df: pd.DataFrame, sr_levels: Dict) -> List[Dict]:
+    def _detect_breakouts(self, df: pd.DataFrame, sr_levels: Dict,
+                          ctx: Optional[DetectionContext] = None) -> List[Dict]:
         """
         Detecta breakouts de suporte/resistência.
         """
@@ -672,34 +789,47 @@ class PatternEngine:
         if not sr_levels or len(df) < 5:
             return breakouts
         
-        current_price = df['close'].iloc[-1]
-        prev_price = df['close'].iloc[-2]
+        close = self._candles(df, ctx).c
+        current_price = close[-1]
+        prev_price = close[-2]
+        
+        resistances = np.asarray(sr_levels.get('resistance', []), dtype=np.float64)
+        supports = np.asarray(sr_levels.get('support', []), dtype=np.float64)
+        
+        # Cruzamentos vetorizados sobre todos os níveis
+        broken_resistances = resistances[(prev_price < resistances) & (current_price > resistances)]
+        broken_supports = supports[(prev_price > supports) & (current_price < supports)]
+        
+        if broken_resistances.size == 0 and broken_supports.size == 0:
+            return breakouts
+        
+        # Spike de volume não depende do nível
+        volume_confirmation = self._check_volume_spike(df, ctx)
         
         # Resistances
-        for resistance in sr_levels.get('resistance', []):
-            if prev_price < resistance and current_price > resistance:
-                breakouts.append({
-                    "type": "RESISTANCE_BREAKOUT",
-                    "direction": "BULLISH",
-                    "level": resistance,
-                    "strength": 70,
-                    "volume_confirmation": self._check_volume_spike(df)
-                })
+        for resistance in broken_resistances.tolist():
+            breakouts.append({
+                "type": "RESISTANCE_BREAKOUT",
+                "direction": "BULLISH",
+                "level": resistance,
+                "strength": 70,
+                "volume_confirmation": volume_confirmation
+            })
         
         # Supports
-        for support in sr_levels.get('support', []):
-            if prev_price > support and current_price < support:
-                breakouts.append({
-                    "type": "SUPPORT_BREAKDOWN",
-                    "direction": "BEARISH",
-                    "level": support,
-                    "strength": 70,
-                    "volume_confirmation": self._check_volume_spike(df)
-                })
+        for support in broken_supports.tolist():
+            breakouts.append({
+                "type": "SUPPORT_BREAKDOWN",
+                "direction": "BEARISH",
+                "level": support,
+                "strength": 70,
+                "volume_confirmation": volume_confirmation
+            })
         
         return breakouts
     
-    def _detect_reversals(self, df_m15: pd.DataFrame, df_h1: pd.DataFrame) -> List[Dict]:
+    def _detect_reversals(self, df_m15: pd.DataFrame, df_h1: pd.DataFrame,
+                          ctx: Optional[DetectionContext] = None) -> List[Dict]:
         """
         Detecta sinais de reversão.
         """
@@ -715,34 +845,97 @@ class PatternEngine:
         
         return reversals
     
-    def _detect_continuations(self, df_m15: pd.DataFrame, df_h1: pd.DataFrame) -> List[Dict]:
+    def _detect_continuations(self, df_m15: pd.DataFrame, df_h1: pd.DataFrame,
+                              ctx: Optional[DetectionContext] = None) -> List[Dict]:
         """
         Detecta sinais de continuação.
         """
         continuations = []
         
         # Pullback em tendência
-        if self._is_healthy_pullback(df_m15, df_h1):
+        if self._is_healthy_pullback(df_m15, df_h1, ctx):
             continuations.append({
                 "type": "PULLBACK_CONTINUATION",
-                "direction": self._get_trend_direction(df_h1),
+                "direction": self._h1_trend(df_h1, ctx),
                 "strength": 70
             })
         
         return continuations
     
-    def _check_volume_spike(self, df: pd.DataFrame) -> bool:
+    def _check_volume_spike(self, df: pd.DataFrame, ctx: Optional[DetectionContext] = None) -> bool:
         """
         Verifica se houve spike de volume.
         """
         if 'volume' not in df.columns or len(df) < 20:
             return False
         
-        avg_vol = df['volume'].tail(20).mean()
-        current_vol = df['volume'].iloc[-1]
+        avg_vol = self._volume_mean(df, ctx=ctx)
+        current_vol = self._candles(df, ctx).v[-1]
         
         return current_vol > avg_vol * 1.5
     
+    def _volume_mean(self, df: pd.DataFrame, window: int = 20,
+                     ctx: Optional[DetectionContext] = None) -> float:
+        """
+        Média de volume das últimas `window` barras.
+        Atualizada em O(1) quando o DataFrame cresce uma barra.
+        """
+        volume = self._candles(df, ctx).v
+        n = len(volume)
+        key = id(df)
+        cached = self._cached_state(self._volume_cache, key, df)
+        
+        if cached and cached[0] == n and cached[1] == volume[-1]:
+            total = cached[2]
+        elif cached and cached[0] == n - 1 and n > window and cached[1] == volume[-2]:
+            total = cached[2] + volume[-1] - volume[-window - 1]
+        else:
+            total = float(volume[-window:].sum())
+        
+        self._store_cache(self._volume_cache, key, (weakref.ref(df), n, volume[-1], total))
+        return total / min(n, window)
+    
+    def _ema(self, df: pd.DataFrame, span: int = 50, ctx: Optional[DetectionContext] = None) -> float:
+        """
+        Último valor da EMA (ajustada, como pandas ewm) do fechamento.
+        Atualizada em O(1) quando o DataFrame cresce uma barra.
+        """
+        close = self._candles(df, ctx).c
+        n = len(close)
+        decay = 1 - 2 / (span + 1)
+        key = id(df)
+        cached = self._cached_state(self._ema_cache, key, df)
+        
+        if cached and cached[0] == n and cached[1] == close[-1]:
+            num, den = cached[2], cached[3]
+        elif cached and cached[0] == n - 1 and cached[1] == close[-2]:
+            num = close[-1] + decay * cached[2]
+            den = 1 + decay * cached[3]
+        else:
+            # Sem Numba, aquece só com as últimas 5*span barras (peso
+            # residual das anteriores ~e^-10)
+            num, den = _ema_state(close if NUMBA_ENABLED else close[-5 * span:], decay)
+        
+        self._store_cache(self._ema_cache, key, (weakref.ref(df), n, close[-1], num, den))
+        return num / den
+    
+    @staticmethod
+    def _cached_state(cache: Dict, key: int, df: pd.DataFrame) -> Optional[Tuple]:
+        """
+        Estado em cache do DataFrame (sem o weakref), ou None se a entrada
+        pertence a outro objeto que reutilizou o mesmo id.
+        """
+        cached = cache.get(key)
+        if cached is None or cached[0]() is not df:
+            return None
+        return cached[1:]
+    
+    def _store_cache(self, cache: Dict, key: int, value: Tuple):
+        """Grava no cache descartando a entrada mais antiga se cheio."""
+        if key not in cache and len(cache) >= _CACHE_SLOTS:
+            del cache[next(iter(cache))]
+        cache[key] = value
+    
     def _check_rsi_divergence(self, df: pd.DataFrame) -> Optional[Dict]:
         """
         Detecta divergências de RSI.
@@ -755,7 +948,8 @@ class PatternEngine:
         
         return None
     
-    def _is_healthy_pullback(self, df_m15: pd.DataFrame, df_h1: pd.DataFrame) -> bool:
+    def _is_healthy_pullback(self, df_m15: pd.DataFrame, df_h1: pd.DataFrame,
+                             ctx: Optional[DetectionContext] = None) -> bool:
         """
         Verifica se é um pullback saudável.
         """
@@ -763,12 +957,13 @@ class PatternEngine:
             return False
         
         # Tendência clara em H1
-        trend = self._get_trend_direction(df_h1)
+        trend = self._h1_trend(df_h1, ctx)
         if trend == "NEUTRAL":
             return False
         
-        # Retração em M15 mas sem quebrar estrutura
-        recent_move = df_m15['close'].iloc[-5:].pct_change().sum()
+        # Retração em M15 mas sem quebrar estrutura (retorno das últimas 4 barras)
+        close = self._candles(df_m15, ctx).c
+        recent_move = close[-1] / close[-5] - 1.0
         
         if trend == "BULLISH" and -0.015 < recent_move < -0.003:
             return True
@@ -778,87 +973,91 @@ class PatternEngine:
         
         return False
     
-    def _get_trend_direction(self, df: pd.DataFrame) -> str:
+    def _h1_trend(self, df_h1: pd.DataFrame, ctx: Optional[DetectionContext] = None) -> str:
+        """
+        Tendência H1 do contexto de detect_all_patterns (calcula se ausente).
+        """
+        trend = ctx.h1_trend if ctx is not None else None
+        if trend is None:
+            trend = self._get_trend_direction(df_h1, ctx)
+        return trend
+    
+    def _get_trend_direction(self, df: pd.DataFrame, ctx: Optional[DetectionContext] = None) -> str:
         """
         Determina direção da tendência.
         """
         if len(df) < 50:
             return "NEUTRAL"
         
-        ema_50 = df['close'].ewm(span=50).mean()
-        current_price = df['close'].iloc[-1]
+        ema_50 = self._ema(df, span=50, ctx=ctx)
+        current_price = self._candles(df, ctx).c[-1]
         
-        if current_price > ema_50.iloc[-1] * 1.005:
+        if current_price > ema_50 * 1.005:
             return "BULLISH"
-        elif current_price < ema_50.iloc[-1] * 0.995:
+        elif current_price < ema_50 * 0.995:
             return "BEARISH"
         else:
             return "NEUTRAL"
     
-    def _calculate_pattern_quality(self, patterns: Dict) -> int:
+    def _scored_signals(self, patterns: Dict) -> Tuple[List[Tuple[Dict, str]], np.ndarray]:
         """
-        Calcula score de qualidade agregado dos padrões.
+        Lista (sinal, fonte) de candles, gráficos e breakouts e o array
+        contíguo de composite scores na mesma ordem.
         """
-        score = 0
-        count = 0
+        signals = []
         
-        # Candle patterns
         for tf, pats in patterns["candle_patterns"].items():
             for pat in pats:
-                score += pat["strength"] * pat["confidence"] / 100
-                count += 1
+                signals.append((pat, f"candle_{tf}"))
         
-        # Chart patterns
         for tf, pats in patterns["chart_patterns"].items():
             for pat in pats:
-                score += pat["strength"] * pat["confidence"] / 100
-                count += 1
+                signals.append((pat, f"chart_{tf}"))
         
-        # Breakouts
+        n_patterns = len(signals)
         for breakout in patterns["breakout_signals"]:
-            score += breakout["strength"]
-            count += 1
+            signals.append((breakout, "breakout"))
         
-        if count == 0:
+        strength = np.fromiter((sig["strength"] for sig, _ in signals), dtype=np.float64, count=len(signals))
+        confidence = np.fromiter(
+            (sig["confidence"] for sig, _ in signals[:n_patterns]), dtype=np.float64, count=n_patterns
+        )
+        
+        # Padrões: strength * confidence / 100; breakouts: strength
+        scores = strength
+        scores[:n_patterns] = strength[:n_patterns] * confidence / 100
+        
+        return signals, scores
+    
+    def _calculate_pattern_quality(self, patterns: Dict) -> int:
+        """
+        Calcula score de qualidade agregado dos padrões.
+        """
+        _, scores = self._scored_signals(patterns)
+        
+        if scores.size == 0:
             return 0
         
-        return int(score / count)
+        return int(scores.sum() / scores.size)
     
     def _determine_primary_signal(self, patterns: Dict) -> Optional[Dict]:
         """
         Determina o sinal primário mais forte.
         """
-        all_signals = []
+        signals, scores = self._scored_signals(patterns)
         
-        # Agregar todos os sinais
-        for tf, pats in patterns["candle_patterns"].items():
-            for pat in pats:
-                all_signals.append({
-                    **pat,
-                    "source": f"candle_{tf}",
-                    "composite_score": pat["strength"] * pat["confidence"] / 100
-                })
-        
-        for tf, pats in patterns["chart_patterns"].items():
-            for pat in pats:
-                all_signals.append({
-                    **pat,
-                    "source": f"chart_{tf}",
-                    "composite_score": pat["strength"] * pat["confidence"] / 100
-                })
-        
-        for breakout in patterns["breakout_signals"]:
-            all_signals.append({
-                **breakout,
-                "source": "breakout",
-                "composite_score": breakout["strength"]
-            })
-        
-        if not all_signals:
+        if scores.size == 0:
             return None
         
-        # Retorna o sinal com maior composite_score
-        return max(all_signals, key=lambda x: x["composite_score"])
+        # Sinal com maior composite_score (primeiro em caso de empate)
+        idx = int(scores.argmax())
+        signal, source = signals[idx]
+        
+        return {
+            **signal,
+            "source": source,
+            "composite_score": signal["strength"] if source == "breakout" else float(scores[idx])
+        }
 
 
 if __name__ == "__main__":
@@ -8,11 +8,20 @@ Limites rígidos, redução automática, pausas e nunca recuperar loss com risco
 
 import json
 import os
+import shutil
+import time
+from collections import deque
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from enum import Enum
 
+try:
+    import orjson
+    ORJSON_ENABLED = True
+except ImportError:
+    ORJSON_ENABLED = False
+
 
 class RiskState(Enum):
     NORMAL = "NORMAL"
@@ -21,7 +30,46 @@ class RiskState(Enum):
     LOCKED = "LOCKED"
 
 
-@dataclass
+class RejectReason(str, Enum):
+    """
+    Motivos fechados de can_trade (valor = rótulo sem valores).
+    A mensagem com valores é montada sob demanda via RiskManager.describe_reason.
+    """
+    ALLOWED = "Liberado para operar"
+    PAUSED = "Bot pausado (pausa automática)"
+    MANUAL_PAUSE = "Bot pausado manualmente"
+    DAILY_LOSS = "Limite de loss diário atingido"
+    WEEKLY_LOSS = "Limite de loss semanal atingido"
+    MONTHLY_LOSS = "Limite de loss mensal atingido"
+    DAILY_TARGET = "Meta diária atingida. Preservar lucro."
+    MAX_TRADES = "Máximo de trades diários atingido"
+    CONSECUTIVE_LOSSES = "Losses consecutivos. Pausa obrigatória."
+    MAX_DRAWDOWN = "Drawdown máximo atingido"
+    MAX_EXPOSURE = "Exposição máxima atingida"
+    TRADE_RISK = "Risco da operação excede margem disponível"
+    
+    def __str__(self) -> str:
+        return self.value
+
+
+# Templates das mensagens formatadas (preenchidos por describe_reason)
+_REASON_TEMPLATES: Dict[RejectReason, str] = {
+    RejectReason.PAUSED: "Bot pausado por mais {remaining} minutos",
+    RejectReason.DAILY_LOSS: "Limite de loss diário atingido: ${daily_loss:.2f}",
+    RejectReason.WEEKLY_LOSS: "Limite de loss semanal atingido: ${weekly_loss:.2f}",
+    RejectReason.MONTHLY_LOSS: "Limite de loss mensal atingido: ${monthly_loss:.2f}",
+    RejectReason.DAILY_TARGET: "Meta diária atingida: ${daily_pnl:.2f}. Preservar lucro.",
+    RejectReason.MAX_TRADES: "Máximo de trades diários atingido: {trades_today}",
+    RejectReason.CONSECUTIVE_LOSSES: "Losses consecutivos ({consecutive_losses}). Pausa obrigatória.",
+    RejectReason.MAX_DRAWDOWN: "Drawdown máximo atingido: {current_drawdown_pct:.2f}%",
+    RejectReason.MAX_EXPOSURE: "Exposição máxima atingida: {current_exposure_pct:.2f}%",
+    RejectReason.TRADE_RISK: (
+        "Risco da operação (${expected_risk:.2f}) excede margem disponível (${remaining_daily_risk:.2f})"
+    ),
+}
+
+
+@dataclass(slots=True)
 class RiskLimits:
     """Limites de risco configuráveis."""
     max_daily_loss: float = 500.0           # Perda máxima diária ($)
@@ -48,7 +96,7 @@ class RiskLimits:
     pause_duration_minutes: int = 60        # Duração da pausa
 
 
-@dataclass
+@dataclass(slots=True)
 class RiskMetrics:
     """Métricas de risco atuais."""
     daily_pnl: float
@@ -74,30 +122,134 @@ class RiskMetrics:
     pause_until: Optional[datetime]
 
 
+def _today_iso() -> str:
+    return date.today().isoformat()
+
+
+@dataclass(slots=True)
+class RiskManagerState:
+    """
+    Estado persistente do RiskManager (atributos com slots no hot path).
+    Convertido de/para dict apenas na fronteira JSON.
+    """
+    initial_balance: float = 10000.0
+    peak_balance: float = 10000.0
+    
+    daily_pnl: float = 0.0
+    weekly_pnl: float = 0.0
+    monthly_pnl: float = 0.0
+    
+    trades_today: int = 0
+    consecutive_losses: int = 0
+    consecutive_wins: int = 0
+    
+    total_trades: int = 0
+    total_wins: int = 0
+    total_losses: int = 0
+    total_profit: float = 0.0
+    total_loss: float = 0.0
+    
+    current_drawdown_pct: float = 0.0
+    max_drawdown_pct: float = 0.0
+    current_exposure_pct: float = 0.0
+    
+    is_paused: bool = False
+    pause_until: Optional[str] = None
+    
+    last_reset_date: str = field(default_factory=_today_iso)
+    last_reset_week: str = field(default_factory=_today_iso)
+    last_reset_month: str = field(default_factory=_today_iso)
+    
+    # Histórico vive no journal; não entra no arquivo de estado
+    trade_history: deque = field(default_factory=lambda: deque(maxlen=1000))
+    pause_history: List[Dict] = field(default_factory=list)
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RiskManagerState":
+        """Cria estado a partir do JSON (chaves desconhecidas são ignoradas)."""
+        return cls(**{
+            f.name: data[f.name] for f in fields(cls)
+            if f.name in data and f.name != "trade_history"
+        })
+    
+    def to_dict(self) -> Dict:
+        """Resumo serializável (sem histórico de trades)."""
+        return {
+            f.name: getattr(self, f.name) for f in fields(self)
+            if f.name != "trade_history"
+        }
+
+
 class RiskManager:
     """
     Gestor de risco profissional com limites rígidos e proteção de capital.
     NUNCA permite quebra de regras de risco.
     """
     
-    def __init__(self, limits: RiskLimits = None, state_file: str = "risk_state.json"):
+    # Intervalo mínimo entre gravações não críticas do estado (s)
+    SAVE_INTERVAL_SECONDS = 1.0
+    
+    # Cópia de segurança (.bak) a cada N gravações bem-sucedidas
+    BACKUP_EVERY_N_SAVES = 10
+    
+    # Trades do journal mantidos em memória / relidos no reinício
+    JOURNAL_TAIL_LINES = 1000
+    
+    # Compacta o journal quando passa de N vezes o histórico mantido
+    JOURNAL_COMPACT_FACTOR = 2
+    
+    # Bloco de leitura do fim do journal no reinício (bytes)
+    JOURNAL_READ_BLOCK = 64 * 1024
+    
+    # Multiplicador de tamanho por estado de risco
+    _STATE_MULT = {
+        RiskState.NORMAL: 1.0,
+        RiskState.CAUTION: 0.75,
+        RiskState.DANGER: 0.5,
+        RiskState.LOCKED: 0.0,
+    }
+    
+    def __init__(self, limits: RiskLimits = None, state_file: str = "risk_state.json",
+                 journal_file: str = None):
         """
         Inicializa gestor de risco.
         
         Args:
             limits: RiskLimits customizados (opcional)
-            state_file: Arquivo para persistir estado
+            state_file: Arquivo para persistir estado (resumo/contadores)
+            journal_file: Journal append-only de trades
+                (padrão: <state_file sem extensão>.journal.ndjson)
         """
         self.limits = limits or RiskLimits()
         self.state_file = state_file
+        self.journal_file = journal_file or os.path.splitext(state_file)[0] + ".journal.ndjson"
+        self._journal_lines = 0
         
         # Estado carregado ou inicializado
         self.state = self._load_state()
-        
-        # Reset automático se mudou o dia
+        self._dirty = False
+        self._last_save_ts = time.monotonic()
+        self._saves_since_backup = 0
+        self._metrics_cache: Optional[RiskMetrics] = None
+        self._pause_until_dt = self._parse_pause_until()
+        self._pause_deadline_monotonic = self._monotonic_deadline(self._pause_until_dt)
+        
+        # Reset automático se mudou o dia (ordinal do dia já verificado)
+        self._today_ordinal = None
         self._check_daily_reset()
+        
+        # Tabelas de redução/aumento por sequência (evita pow no sizing)
+        self._reduction_table = [
+            self.limits.reduction_factor ** i
+            for i in range(self.limits.max_consecutive_losses + 2)
+        ]
+        # Aumento após wins satura em 1.2 a partir de 4 wins
+        self._win_boost_table = [min(1.2, 1.0 + (i * 0.05)) for i in range(5)]
+        
+        # Estado de risco cacheado (recalculado nos mutadores)
+        self._recompute_risk_state()
     
-    def can_trade(self, expected_risk: float = None) -> Tuple[bool, str]:
+    def can_trade(self, expected_risk: float = None) -> Tuple[bool, RejectReason]:
         """
         Verifica se pode operar.
         
@@ -105,84 +257,137 @@ class RiskManager:
             expected_risk: Risco esperado da operação ($)
         
         Returns:
-            (pode_operar, motivo)
+            (pode_operar, motivo) - motivo é um RejectReason; use
+            describe_reason() para a mensagem formatada
         """
         self._check_daily_reset()
         
+        # Gravação pendente (lote de trades não críticos)
+        if self._dirty:
+            self._save_state()
+        
         # ═══════════════════════════════════
         # 1. PAUSADO?
         # ═══════════════════════════════════
-        if self.state["is_paused"]:
-            if self.state["pause_until"]:
-                pause_until = datetime.fromisoformat(self.state["pause_until"])
-                if datetime.now() < pause_until:
-                    remaining = (pause_until - datetime.now()).seconds // 60
-                    return False, f"Bot pausado por mais {remaining} minutos"
+        if self.state.is_paused:
+            if self._pause_deadline_monotonic is not None:
+                # Relógio monotônico: imune a ajustes de NTP/horário
+                if time.monotonic() < self._pause_deadline_monotonic:
+                    return False, RejectReason.PAUSED
                 else:
                     # Fim da pausa
-                    self.state["is_paused"] = False
-                    self.state["pause_until"] = None
-                    self._save_state()
+                    self.state.is_paused = False
+                    self.state.pause_until = None
+                    self._pause_until_dt = None
+                    self._pause_deadline_monotonic = None
+                    self._recompute_risk_state()
+                    self._metrics_cache = None
+                    self._save_state(force=True)
             else:
-                return False, "Bot pausado manualmente"
+                return False, RejectReason.MANUAL_PAUSE
+        
+        # ═══════════════════════════════════
+        # 2-9. LIMITES (comparações ao vivo: limits e exposição são
+        # atribuídos diretamente pelos chamadores)
+        # ═══════════════════════════════════
+        blocked = self._trade_block_reason()
+        if blocked is not None:
+            return False, blocked
         
+        # ═══════════════════════════════════
+        # 10. RISCO DA OPERAÇÃO
+        # ═══════════════════════════════════
+        if expected_risk:
+            remaining_daily_risk = self.limits.max_daily_loss - abs(self.state.daily_pnl)
+            if expected_risk > remaining_daily_risk:
+                return False, RejectReason.TRADE_RISK
+        
+        return True, RejectReason.ALLOWED
+    
+    def describe_reason(self, reason: RejectReason, expected_risk: float = None) -> str:
+        """
+        Monta a mensagem legível de um RejectReason com os valores atuais.
+        
+        Args:
+            reason: Motivo retornado por can_trade
+            expected_risk: Mesmo valor passado a can_trade (para TRADE_RISK)
+        """
+        remaining = 0
+        if self._pause_deadline_monotonic is not None:
+            remaining = max(0, int(self._pause_deadline_monotonic - time.monotonic()) // 60)
+        
+        template = _REASON_TEMPLATES.get(reason)
+        if template is None:
+            return reason.value
+        
+        return template.format(
+            remaining=remaining,
+            daily_loss=abs(self.state.daily_pnl),
+            weekly_loss=abs(self.state.weekly_pnl),
+            monthly_loss=abs(self.state.monthly_pnl),
+            daily_pnl=self.state.daily_pnl,
+            trades_today=self.state.trades_today,
+            consecutive_losses=self.state.consecutive_losses,
+            current_drawdown_pct=self.state.current_drawdown_pct,
+            current_exposure_pct=self.state.current_exposure_pct,
+            expected_risk=expected_risk or 0.0,
+            remaining_daily_risk=self.limits.max_daily_loss - abs(self.state.daily_pnl),
+        )
+    
+    def _trade_block_reason(self) -> Optional[RejectReason]:
+        """
+        Avalia os limites de perda, meta, trades, drawdown e exposição.
+        Retorna o motivo do bloqueio ou None se liberado.
+        """
         # ═══════════════════════════════════
         # 2. LOSS DIÁRIO
         # ═══════════════════════════════════
-        if self.state["daily_pnl"] <= -self.limits.max_daily_loss:
-            return False, f"Limite de loss diário atingido: ${abs(self.state['daily_pnl']):.2f}"
+        if self.state.daily_pnl <= -self.limits.max_daily_loss:
+            return RejectReason.DAILY_LOSS
         
         # ═══════════════════════════════════
         # 3. LOSS SEMANAL
         # ═══════════════════════════════════
-        if self.state["weekly_pnl"] <= -self.limits.max_weekly_loss:
-            return False, f"Limite de loss semanal atingido: ${abs(self.state['weekly_pnl']):.2f}"
+        if self.state.weekly_pnl <= -self.limits.max_weekly_loss:
+            return RejectReason.WEEKLY_LOSS
         
         # ═══════════════════════════════════
         # 4. LOSS MENSAL
         # ═══════════════════════════════════
-        if self.state["monthly_pnl"] <= -self.limits.max_monthly_loss:
-            return False, f"Limite de loss mensal atingido: ${abs(self.state['monthly_pnl']):.2f}"
+        if self.state.monthly_pnl <= -self.limits.max_monthly_loss:
+            return RejectReason.MONTHLY_LOSS
         
         # ═══════════════════════════════════
         # 5. META DIÁRIA ATINGIDA
         # ═══════════════════════════════════
-        if self.state["daily_pnl"] >= self.limits.daily_profit_target:
-            return False, f"Meta diária atingida: ${self.state['daily_pnl']:.2f}. Preservar lucro."
+        if self.state.daily_pnl >= self.limits.daily_profit_target:
+            return RejectReason.DAILY_TARGET
         
         # ═══════════════════════════════════
         # 6. MÁXIMO DE TRADES DIÁRIOS
         # ═══════════════════════════════════
-        if self.state["trades_today"] >= self.limits.max_trades_per_day:
-            return False, f"Máximo de trades diários atingido: {self.state['trades_today']}"
+        if self.state.trades_today >= self.limits.max_trades_per_day:
+            return RejectReason.MAX_TRADES
         
         # ═══════════════════════════════════
         # 7. LOSSES CONSECUTIVOS
         # ═══════════════════════════════════
-        if self.state["consecutive_losses"] >= self.limits.max_consecutive_losses:
-            return False, f"Losses consecutivos ({self.state['consecutive_losses']}). Pausa obrigatória."
+        if self.state.consecutive_losses >= self.limits.max_consecutive_losses:
+            return RejectReason.CONSECUTIVE_LOSSES
         
         # ═══════════════════════════════════
         # 8. DRAWDOWN MÁXIMO
         # ═══════════════════════════════════
-        if self.state["current_drawdown_pct"] >= self.limits.max_drawdown_pct:
-            return False, f"Drawdown máximo atingido: {self.state['current_drawdown_pct']:.2f}%"
+        if self.state.current_drawdown_pct >= self.limits.max_drawdown_pct:
+            return RejectReason.MAX_DRAWDOWN
         
         # ═══════════════════════════════════
         # 9. EXPOSIÇÃO MÁXIMA
         # ═══════════════════════════════════
-        if self.state["current_exposure_pct"] >= self.limits.max_exposure_pct:
-            return False, f"Exposição máxima atingida: {self.state['current_exposure_pct']:.2f}%"
+        if self.state.current_exposure_pct >= self.limits.max_exposure_pct:
+            return RejectReason.MAX_EXPOSURE
         
-        # ═══════════════════════════════════
-        # 10. RISCO DA OPERAÇÃO
-        # ═══════════════════════════════════
-        if expected_risk:
-            remaining_daily_risk = self.limits.max_daily_loss - abs(self.state["daily_pnl"])
-            if expected_risk > remaining_daily_risk:
-                return False, f"Risco da operação (${expected_risk:.2f}) excede margem disponível (${remaining_daily_risk:.2f})"
-        
-        return True, "Liberado para operar"
+        return None
     
     def calculate_position_size(
         self,
@@ -207,28 +412,27 @@ class RiskManager:
         # ═══════════════════════════════════
         # REDUÇÃO APÓS LOSS
         # ═══════════════════════════════════
-        if self.limits.reduce_size_after_loss and self.state["consecutive_losses"] > 0:
-            reduction = self.limits.reduction_factor ** self.state["consecutive_losses"]
+        losses = self.state.consecutive_losses
+        if self.limits.reduce_size_after_loss and losses > 0:
+            if losses < len(self._reduction_table):
+                reduction = self._reduction_table[losses]
+            else:
+                # Sequência acima da tabela (sem pausa automática)
+                reduction = self.limits.reduction_factor ** losses
             position_size *= reduction
         
         # ═══════════════════════════════════
         # AUMENTO APÓS WINS (CAUTELOSO)
         # ═══════════════════════════════════
-        if self.state["consecutive_wins"] >= 3:
+        wins = self.state.consecutive_wins
+        if wins >= 3:
             # Aumento moderado (máx 20%)
-            position_size *= min(1.2, 1.0 + (self.state["consecutive_wins"] * 0.05))
+            position_size *= self._win_boost_table[min(wins, len(self._win_boost_table) - 1)]
         
         # ═══════════════════════════════════
         # ESTADO DE RISCO
         # ═══════════════════════════════════
-        risk_state = self._calculate_risk_state()
-        
-        if risk_state == RiskState.CAUTION:
-            position_size *= 0.75
-        elif risk_state == RiskState.DANGER:
-            position_size *= 0.5
-        elif risk_state == RiskState.LOCKED:
-            position_size = 0.0
+        position_size *= self._STATE_MULT[self._risk_state]
         
         # ═══════════════════════════════════
         # LIMITES ABSOLUTOS
@@ -252,88 +456,111 @@ class RiskManager:
             was_win: Se foi win ou loss
             trade_details: Detalhes adicionais do trade
         """
+        # Um único timestamp para o trade e uma eventual pausa
+        now = datetime.now()
+        
         # Atualizar P&L
-        self.state["daily_pnl"] += profit_loss
-        self.state["weekly_pnl"] += profit_loss
-        self.state["monthly_pnl"] += profit_loss
+        self.state.daily_pnl += profit_loss
+        self.state.weekly_pnl += profit_loss
+        self.state.monthly_pnl += profit_loss
         
         # Atualizar contadores
-        self.state["trades_today"] += 1
-        self.state["total_trades"] += 1
+        self.state.trades_today += 1
+        self.state.total_trades += 1
         
         # Consecutivos
         if was_win:
-            self.state["consecutive_wins"] += 1
-            self.state["consecutive_losses"] = 0
-            self.state["total_wins"] += 1
-            self.state["total_profit"] += profit_loss
+            self.state.consecutive_wins += 1
+            self.state.consecutive_losses = 0
+            self.state.total_wins += 1
+            self.state.total_profit += profit_loss
         else:
-            self.state["consecutive_losses"] += 1
-            self.state["consecutive_wins"] = 0
-            self.state["total_losses"] += 1
-            self.state["total_loss"] += abs(profit_loss)
+            self.state.consecutive_losses += 1
+            self.state.consecutive_wins = 0
+            self.state.total_losses += 1
+            self.state.total_loss += abs(profit_loss)
         
         # Atualizar drawdown
         self._update_drawdown()
         
-        # Salvar histórico
-        self.state["trade_history"].append({
-            "timestamp": datetime.now().isoformat(),
-            "pnl": profit_loss,
-            "was_win": was_win,
-            "details": trade_details or {}
-        })
-        
-        # Limitar histórico (últimos 1000 trades)
-        if len(self.state["trade_history"]) > 1000:
-            self.state["trade_history"] = self.state["trade_history"][-1000:]
-        
         # ═══════════════════════════════════
         # PAUSA AUTOMÁTICA
         # ═══════════════════════════════════
         if (self.limits.pause_after_losses and 
-            self.state["consecutive_losses"] >= self.limits.max_consecutive_losses):
-            self._activate_pause()
+            self.state.consecutive_losses >= self.limits.max_consecutive_losses):
+            self._activate_pause(now)
         
-        self._save_state()
+        self._recompute_risk_state()
+        self._metrics_cache = None
+        
+        # Loss, pausa ou limite atingido: gravar imediatamente. O resumo é
+        # gravado antes do journal: uma queda entre os dois nunca perde
+        # contadores de loss (no máximo falta a linha do trade no histórico)
+        self._save_state(
+            force=not was_win or self.state.is_paused or self._trade_block_reason() is not None
+        )
+        
+        # Salvar histórico (memória + journal append-only)
+        entry = {
+            "timestamp": now.isoformat(),
+            "pnl": profit_loss,
+            "was_win": was_win,
+            "details": trade_details or {}
+        }
+        # deque(maxlen) descarta o mais antigo em O(1)
+        self.state.trade_history.append(entry)
+        self._append_journal(entry)
+        if self._journal_lines > self.JOURNAL_COMPACT_FACTOR * self.JOURNAL_TAIL_LINES:
+            self._compact_journal(self.state.trade_history)
     
     def get_risk_metrics(self) -> RiskMetrics:
         """
         Retorna métricas de risco atuais.
+        Cacheadas até o próximo mutador de estado (record_trade, pausa, reset)
+        ou até a exposição (atribuída diretamente no estado) mudar.
+        """
+        cache = self._metrics_cache
+        if cache is None or cache.current_exposure_pct != self.state.current_exposure_pct:
+            self._metrics_cache = self._build_metrics()
+        return self._metrics_cache
+    
+    def _build_metrics(self) -> RiskMetrics:
+        """
+        Monta RiskMetrics a partir do estado atual.
         """
         # Calcular métricas derivadas
-        total_trades = self.state["total_trades"]
+        total_trades = self.state.total_trades
         
         if total_trades > 0:
-            win_rate = (self.state["total_wins"] / total_trades) * 100
-            avg_win = self.state["total_profit"] / max(1, self.state["total_wins"])
-            avg_loss = self.state["total_loss"] / max(1, self.state["total_losses"])
+            win_rate = (self.state.total_wins / total_trades) * 100
+            avg_win = self.state.total_profit / max(1, self.state.total_wins)
+            avg_loss = self.state.total_loss / max(1, self.state.total_losses)
             
-            if self.state["total_loss"] > 0:
-                profit_factor = self.state["total_profit"] / self.state["total_loss"]
+            if self.state.total_loss > 0:
+                profit_factor = self.state.total_profit / self.state.total_loss
             else:
-                profit_factor = float('inf') if self.state["total_profit"] > 0 else 0.0
+                profit_factor = float('inf') if self.state.total_profit > 0 else 0.0
         else:
             win_rate = 0.0
             avg_win = 0.0
             avg_loss = 0.0
             profit_factor = 0.0
         
-        risk_state = self._calculate_risk_state()
+        risk_state = self._risk_state
         
         return RiskMetrics(
-            daily_pnl=self.state["daily_pnl"],
-            weekly_pnl=self.state["weekly_pnl"],
-            monthly_pnl=self.state["monthly_pnl"],
+            daily_pnl=self.state.daily_pnl,
+            weekly_pnl=self.state.weekly_pnl,
+            monthly_pnl=self.state.monthly_pnl,
             
-            trades_today=self.state["trades_today"],
-            consecutive_losses=self.state["consecutive_losses"],
-            consecutive_wins=self.state["consecutive_wins"],
+            trades_today=self.state.trades_today,
+            consecutive_losses=self.state.consecutive_losses,
+            consecutive_wins=self.state.consecutive_wins,
             
-            current_drawdown_pct=self.state["current_drawdown_pct"],
-            max_drawdown_pct=self.state["max_drawdown_pct"],
+            current_drawdown_pct=self.state.current_drawdown_pct,
+            max_drawdown_pct=self.state.max_drawdown_pct,
             
-            current_exposure_pct=self.state["current_exposure_pct"],
+            current_exposure_pct=self.state.current_exposure_pct,
             
             win_rate=win_rate,
             average_win=avg_win,
@@ -341,24 +568,36 @@ class RiskManager:
             profit_factor=profit_factor,
             
             risk_state=risk_state.value,
-            is_paused=self.state["is_paused"],
-            pause_until=datetime.fromisoformat(self.state["pause_until"]) if self.state["pause_until"] else None
+            is_paused=self.state.is_paused,
+            pause_until=self._pause_until_dt
         )
     
     def _calculate_risk_state(self) -> RiskState:
+        """
+        Retorna estado de risco atual (cacheado).
+        """
+        return self._risk_state
+    
+    def _recompute_risk_state(self):
+        """
+        Recalcula estado de risco; chamado apenas pelos mutadores de estado.
+        """
+        self._risk_state = self._evaluate_risk_state()
+    
+    def _evaluate_risk_state(self) -> RiskState:
         """
         Calcula estado de risco atual.
         """
         # Loss em relação aos limites
-        daily_loss_pct = abs(self.state["daily_pnl"]) / self.limits.max_daily_loss * 100
+        daily_loss_pct = abs(self.state.daily_pnl) / self.limits.max_daily_loss * 100
         
-        if self.state["is_paused"] or self.state["consecutive_losses"] >= self.limits.max_consecutive_losses:
+        if self.state.is_paused or self.state.consecutive_losses >= self.limits.max_consecutive_losses:
             return RiskState.LOCKED
         
-        if daily_loss_pct > 80 or self.state["current_drawdown_pct"] > 12:
+        if daily_loss_pct > 80 or self.state.current_drawdown_pct > 12:
             return RiskState.DANGER
         
-        if daily_loss_pct > 50 or self.state["consecutive_losses"] >= 2:
+        if daily_loss_pct > 50 or self.state.consecutive_losses >= 2:
             return RiskState.CAUTION
         
         return RiskState.NORMAL
@@ -368,33 +607,39 @@ class RiskManager:
         Atualiza cálculo de drawdown.
         """
         # Peak (maior saldo)
-        current_balance = self.state["initial_balance"] + self.state["monthly_pnl"]
+        current_balance = self.state.initial_balance + self.state.monthly_pnl
         
-        if current_balance > self.state["peak_balance"]:
-            self.state["peak_balance"] = current_balance
+        if current_balance > self.state.peak_balance:
+            self.state.peak_balance = current_balance
         
         # Drawdown atual
-        if self.state["peak_balance"] > 0:
-            drawdown = ((self.state["peak_balance"] - current_balance) / 
-                       self.state["peak_balance"] * 100)
-            self.state["current_drawdown_pct"] = max(0, drawdown)
+        if self.state.peak_balance > 0:
+            drawdown = ((self.state.peak_balance - current_balance) / 
+                       self.state.peak_balance * 100)
+            self.state.current_drawdown_pct = max(0, drawdown)
             
             # Max drawdown
-            if self.state["current_drawdown_pct"] > self.state["max_drawdown_pct"]:
-                self.state["max_drawdown_pct"] = self.state["current_drawdown_pct"]
+            if self.state.current_drawdown_pct > self.state.max_drawdown_pct:
+                self.state.max_drawdown_pct = self.state.current_drawdown_pct
     
-    def _activate_pause(self):
+    def _activate_pause(self, now: datetime = None):
         """
         Ativa pausa automática.
+        
+        Args:
+            now: Timestamp do evento que disparou a pausa (padrão: agora)
         """
-        self.state["is_paused"] = True
-        self.state["pause_until"] = (
-            datetime.now() + timedelta(minutes=self.limits.pause_duration_minutes)
-        ).isoformat()
+        now = now or datetime.now()
         
-        self.state["pause_history"].append({
-            "timestamp": datetime.now().isoformat(),
-            "reason": f"Losses consecutivos: {self.state['consecutive_losses']}",
+        self.state.is_paused = True
+        self._pause_deadline_monotonic = time.monotonic() + self.limits.pause_duration_minutes * 60
+        # Horário de parede apenas para persistência/exibição
+        self._pause_until_dt = now + timedelta(minutes=self.limits.pause_duration_minutes)
+        self.state.pause_until = self._pause_until_dt.isoformat()
+        
+        self.state.pause_history.append({
+            "timestamp": now.isoformat(),
+            "reason": f"Losses consecutivos: {self.state.consecutive_losses}",
             "duration_minutes": self.limits.pause_duration_minutes
         })
         
@@ -402,91 +647,245 @@ class RiskManager:
     
     def manual_pause(self):
         """Pausa manual."""
-        self.state["is_paused"] = True
-        self.state["pause_until"] = None
-        self._save_state()
+        self.state.is_paused = True
+        self.state.pause_until = None
+        self._pause_until_dt = None
+        self._pause_deadline_monotonic = None
+        self._recompute_risk_state()
+        self._metrics_cache = None
+        self._save_state(force=True)
     
     def manual_resume(self):
         """Resume manual."""
-        self.state["is_paused"] = False
-        self.state["pause_until"] = None
-        self._save_state()
+        self.state.is_paused = False
+        self.state.pause_until = None
+        self._pause_until_dt = None
+        self._pause_deadline_monotonic = None
+        self._recompute_risk_state()
+        self._metrics_cache = None
+        self._save_state(force=True)
+    
+    def _parse_pause_until(self) -> Optional[datetime]:
+        """
+        Converte pause_until persistido (ISO) uma única vez no carregamento.
+        """
+        pause_until = self.state.pause_until
+        return datetime.fromisoformat(pause_until) if pause_until else None
+    
+    @staticmethod
+    def _monotonic_deadline(pause_until: Optional[datetime]) -> Optional[float]:
+        """
+        Converte o fim da pausa (horário de parede) em prazo no relógio monotônico.
+        """
+        if pause_until is None:
+            return None
+        return time.monotonic() + (pause_until - datetime.now()).total_seconds()
     
     def _check_daily_reset(self):
         """
         Verifica se precisa fazer reset diário.
         """
-        today = date.today().isoformat()
+        # Caminho rápido: mesmo dia já verificado (comparação de inteiros)
+        today_date = date.today()
+        today_ord = today_date.toordinal()
+        if today_ord == self._today_ordinal:
+            return
         
-        if self.state["last_reset_date"] != today:
+        self._today_ordinal = today_ord
+        today = today_date.isoformat()
+        
+        if self.state.last_reset_date != today:
             # Reset diário
-            self.state["daily_pnl"] = 0.0
-            self.state["trades_today"] = 0
-            self.state["last_reset_date"] = today
+            self.state.daily_pnl = 0.0
+            self.state.trades_today = 0
+            self.state.last_reset_date = today
             
-            # Reset semanal (domingo)
-            if datetime.now().weekday() == 6:  # Sunday
-                self.state["weekly_pnl"] = 0.0
-                self.state["last_reset_week"] = today
+            # Reset semanal (domingo) - mesma data do reset diário
+            if today_date.weekday() == 6:  # Sunday
+                self.state.weekly_pnl = 0.0
+                self.state.last_reset_week = today
             
             # Reset mensal (dia 1)
-            if datetime.now().day == 1:
-                self.state["monthly_pnl"] = 0.0
-                self.state["last_reset_month"] = today
+            if today_date.day == 1:
+                self.state.monthly_pnl = 0.0
+                self.state.last_reset_month = today
             
-            self._save_state()
+            self._recompute_risk_state()
+            self._metrics_cache = None
+            self._save_state(force=True)
     
-    def _load_state(self) -> Dict:
+    def _load_state(self) -> RiskManagerState:
         """
         Carrega estado do arquivo ou inicializa novo.
+        O histórico de trades vem do journal (últimas JOURNAL_TAIL_LINES linhas).
         """
-        if os.path.exists(self.state_file):
+        data = self._read_state_file()
+        legacy_history = data.get("trade_history", [])
+        state = RiskManagerState.from_dict(data)
+        limit = self.JOURNAL_TAIL_LINES
+        
+        if os.path.exists(self.journal_file):
+            state.trade_history, stale = self._read_journal_tail(limit)
+            self._journal_lines = len(state.trade_history)
+            if stale:
+                # Linhas antigas além do histórico ou última linha cortada:
+                # reescreve só o histórico lido (o próximo append começa em
+                # linha nova em vez de colar na linha parcial)
+                self._compact_journal(state.trade_history)
+        else:
+            # Estado legado com histórico embutido: migra para o journal
+            state.trade_history = deque(legacy_history, maxlen=limit)
+            self._compact_journal(state.trade_history)
+        
+        return state
+    
+    def _read_state_file(self) -> Dict:
+        """
+        Lê o resumo persistido (dict vazio = estado inicial).
+        Se o arquivo estiver corrompido, recupera da última cópia .bak.
+        """
+        if not os.path.exists(self.state_file):
+            # Estado inicial
+            return {}
+        
+        for path in (self.state_file, self.state_file + ".bak"):
+            if not os.path.exists(path):
+                continue
             try:
-                with open(self.state_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
+                return self._read_json(path)
+            except (ValueError, OSError) as e:
+                print(f"⚠️  Estado de risco ilegível ({path}): {e}")
         
-        # Estado inicial
-        return {
-            "initial_balance": 10000.0,
-            "peak_balance": 10000.0,
-            
-            "daily_pnl": 0.0,
-            "weekly_pnl": 0.0,
-            "monthly_pnl": 0.0,
-            
-            "trades_today": 0,
-            "consecutive_losses": 0,
-            "consecutive_wins": 0,
-            
-            "total_trades": 0,
-            "total_wins": 0,
-            "total_losses": 0,
-            "total_profit": 0.0,
-            "total_loss": 0.0,
-            
-            "current_drawdown_pct": 0.0,
-            "max_drawdown_pct": 0.0,
-            "current_exposure_pct": 0.0,
-            
-            "is_paused": False,
-            "pause_until": None,
-            
-            "last_reset_date": date.today().isoformat(),
-            "last_reset_week": date.today().isoformat(),
-            "last_reset_month": date.today().isoformat(),
-            
-            "trade_history": [],
-            "pause_history": []
-        }
+        # Sem cópia válida: reinicia (perde pico/drawdown persistidos)
+        print("⚠️  Nenhum estado de risco recuperável - iniciando estado novo")
+        return {}
+    
+    @staticmethod
+    def _read_json(path: str) -> Dict:
+        """
+        Lê um arquivo de estado JSON (orjson se disponível).
+        """
+        if ORJSON_ENABLED:
+            with open(path, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        
+        if not isinstance(data, dict):
+            raise ValueError("conteúdo não é um objeto JSON")
+        return data
+    
+    def flush(self):
+        """
+        Grava imediatamente qualquer estado pendente (chamar ao encerrar o bot).
+        """
+        if self._dirty:
+            self._save_state(force=True)
+    
+    def _save_state(self, force: bool = False):
+        """
+        Salva resumo do estado no arquivo (sem histórico, que vai para o journal).
+        
+        Gravações não críticas são agrupadas (no máximo uma por
+        SAVE_INTERVAL_SECONDS); eventos críticos usam force=True.
+        A escrita é atômica (arquivo temporário + os.replace).
+        """
+        now = time.monotonic()
+        if not force and now - self._last_save_ts < self.SAVE_INTERVAL_SECONDS:
+            self._dirty = True
+            return
+        
+        summary = self.state.to_dict()
+        tmp_file = self.state_file + ".tmp"
+        
+        if ORJSON_ENABLED:
+            data = orjson.dumps(
+                summary,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+        else:
+            with open(tmp_file, 'w') as f:
+                json.dump(summary, f, indent=2)
+        
+        os.replace(tmp_file, self.state_file)
+        self._dirty = False
+        self._last_save_ts = now
+        
+        # Última versão boa conhecida para recuperação em _read_state_file
+        self._saves_since_backup += 1
+        backup_file = self.state_file + ".bak"
+        if self._saves_since_backup >= self.BACKUP_EVERY_N_SAVES or not os.path.exists(backup_file):
+            shutil.copy2(self.state_file, backup_file)
+            self._saves_since_backup = 0
     
-    def _save_state(self):
+    @staticmethod
+    def _journal_line(entry: Dict) -> bytes:
         """
-        Salva estado no arquivo.
+        Serializa um trade como uma linha NDJSON.
+        """
+        if ORJSON_ENABLED:
+            line = orjson.dumps(entry, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        else:
+            line = json.dumps(entry).encode()
+        return line + b"\n"
+    
+    def _append_journal(self, entry: Dict):
+        """
+        Acrescenta um trade ao journal (uma linha NDJSON, O(1) por trade).
+        """
+        with open(self.journal_file, 'ab') as f:
+            f.write(self._journal_line(entry))
+        self._journal_lines += 1
+    
+    def _compact_journal(self, history: deque):
         """
-        with open(self.state_file, 'w') as f:
-            json.dump(self.state, f, indent=2)
+        Reescreve o journal apenas com o histórico mantido (escrita atômica).
+        Mantém o arquivo - e a leitura no reinício - limitados.
+        """
+        tmp_file = self.journal_file + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(b"".join(self._journal_line(entry) for entry in history))
+        
+        os.replace(tmp_file, self.journal_file)
+        self._journal_lines = len(history)
+    
+    def _read_journal_tail(self, limit: int) -> Tuple[deque, bool]:
+        """
+        Reconstrói histórico a partir das últimas `limit` linhas do journal,
+        lendo blocos a partir do fim do arquivo (custo independe do tamanho).
+        Linhas corrompidas (ex: escrita interrompida) são ignoradas.
+        
+        Returns:
+            (histórico, se o arquivo precisa ser compactado: havia linhas
+            anteriores às lidas ou o arquivo não termina em quebra de linha)
+        """
+        with open(self.journal_file, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            data = b""
+            # limit+1 quebras de linha garantem `limit` linhas completas
+            while pos > 0 and data.count(b"\n") <= limit:
+                step = min(self.JOURNAL_READ_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+        
+        lines = data.splitlines()
+        if pos > 0:
+            # Primeira linha do bloco pode estar cortada
+            lines = lines[1:]
+        torn = bool(data) and not data.endswith(b"\n")
+        stale = pos > 0 or len(lines) > limit or torn
+        
+        history = deque(maxlen=limit)
+        for line in lines[-limit:]:
+            try:
+                history.append(orjson.loads(line) if ORJSON_ENABLED else json.loads(line))
+            except ValueError:
+                continue
+        return history, stale
 
 
 if __name__ == "__main__":
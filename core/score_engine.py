@@ -8,13 +8,109 @@ Score 65-89: ALERTA APENAS
 Score ≥ 90: EXECUÇÃO AUTOMÁTICA
 """
 
+import io
+import math
+import sys
+import time
 import numpy as np
+from collections import OrderedDict, deque
 from typing import Dict, List, Tuple
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, fields, replace
+from types import MappingProxyType
 
+from core._numba_compat import njit, NUMBA_ENABLED
 
-@dataclass
+
+# Mapping vazio compartilhado (imutável): evita alocar {} a cada .get ausente
+_EMPTY = MappingProxyType({})
+
+
+def _g(d, *keys):
+    """
+    Percorre dicts aninhados; retorna _EMPTY na primeira chave ausente.
+    """
+    for k in keys:
+        d = d.get(k, _EMPTY)
+        if d is _EMPTY:
+            return _EMPTY
+    return d
+
+
+# Tabelas de pontos por classificação (substituem cadeias if/elif de strings)
+_VOL_SCORE = {"NORMAL": 6.0, "ALTA": 4.0, "BAIXA": 3.0, "MUITO_ALTA": 1.0}
+_STRUCT_SCORE = {"HIGHER_HIGH": 5.0, "LOWER_LOW": 5.0, "HIGHER_LOW": 3.0, "LOWER_HIGH": 3.0}
+_MOMENTUM_STRENGTH = {"STRONG": 4.0, "MODERATE": 2.0}
+
+# Recomendações internadas: comparações a jusante viram checagem de identidade
+_EXECUTE = sys.intern("EXECUTE")
+_ALERT_ONLY = sys.intern("ALERT_ONLY")
+_NO_TRADE = sys.intern("NO_TRADE")
+
+# Ordem canônica dos componentes e ordem crescente de custo (fast_reject)
+_COMPONENT_ORDER = ("trend", "momentum", "confirmations", "risk", "context")
+_FAST_REJECT_ORDER = ("context", "trend", "momentum", "risk", "confirmations")
+
+# Por componente: (mínimo p/ razão, razão, máximo p/ aviso, aviso)
+_COMPONENT_NOTES = {
+    "trend": (20, "Tendência forte e clara ({:.1f}/25)", 10, "Tendência fraca ou indefinida"),
+    "momentum": (15, "Momentum forte ({:.1f}/20)", 8, "Momentum fraco"),
+    "confirmations": (20, "Múltiplas confirmações técnicas ({:.1f}/25)", 10, "Poucas confirmações técnicas"),
+    "risk": (15, "Risco controlado e favorável ({:.1f}/20)", 8, "Risco desfavorável"),
+    "context": (8, "Contexto favorável ({:.1f}/10)", 4, "Contexto desfavorável"),
+}
+
+# Cabeçalho fixo de explain_score (preenchido com format_map)
+_EXPLAIN_HEADER = (
+    "═══════════════════════════════════════\n"
+    "SCORE TOTAL: {total_score}/100\n"
+    "RECOMENDAÇÃO: {recommendation}\n"
+    "CONFIANÇA: {confidence:.1f}%\n"
+    "═══════════════════════════════════════"
+)
+
+
+@njit(cache=True, nogil=True)
+def _confirmations_kernel(candle_strengths, chart_best_confidence):
+    """
+    Pontos de padrões (candle + gráfico) sobre arrays contíguos (SoA).
+    
+    Args:
+        candle_strengths: strength de todos os padrões de candle (todos os TFs)
+        chart_best_confidence: maior confidence de padrão gráfico por TF
+    """
+    strong_patterns = 0
+    for v in candle_strengths:
+        if v >= 70.0:
+            strong_patterns += 1
+    score = min(strong_patterns * 3.0, 9.0)
+    
+    # Máximo 1 por timeframe (já reduzido ao maior valor do TF)
+    for v in chart_best_confidence:
+        if v >= 65.0:
+            score += 4.0
+    return score
+
+
+def _flatten_patterns(pattern_analysis: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Achata candle/chart patterns em arrays float64 para o kernel.
+    """
+    candle_patterns = pattern_analysis.get("candle_patterns", _EMPTY)
+    chart_patterns = pattern_analysis.get("chart_patterns", _EMPTY)
+    
+    candle_strengths = np.array(
+        [p.get("strength", 0) for patterns in candle_patterns.values() for p in patterns],
+        dtype=np.float64
+    )
+    chart_best_confidence = np.array(
+        [max(p.get("confidence", 0) for p in patterns)
+         for patterns in chart_patterns.values() if patterns],
+        dtype=np.float64
+    )
+    return candle_strengths, chart_best_confidence
+
+
+@dataclass(slots=True)
 class ScoreWeights:
     """Pesos calibrados para cada componente do score."""
     trend: float = 0.25          # 25 pontos
@@ -24,7 +120,7 @@ class ScoreWeights:
     context: float = 0.10        # 10 pontos
 
 
-@dataclass
+@dataclass(slots=True)
 class ScoreResult:
     """Resultado completo do score."""
     total_score: int
@@ -36,103 +132,298 @@ class ScoreResult:
     confidence: float
 
 
+# Campos booleanos do BatchInput (demais são float64)
+_BATCH_BOOL_FIELDS = frozenset({
+    "trend_directional", "h1_ema_aligned", "momentum_directional",
+    "volume_available", "volume_trend_confirmation", "movement_strong",
+    "has_risk", "session_favorable", "has_learning",
+})
+
+
+@dataclass
+class BatchInput:
+    """
+    Entradas de N setups em layout SoA (um array float64/bool por campo).
+    Rótulos categóricos já chegam convertidos em pontos pelas tabelas do módulo.
+    """
+    trend_directional: np.ndarray        # consenso BULLISH/BEARISH
+    trend_strength: np.ndarray           # força do consenso (0-100)
+    h1_ema_aligned: np.ndarray
+    
+    momentum_score: np.ndarray
+    momentum_directional: np.ndarray     # direção != NEUTRAL
+    momentum_strength_points: np.ndarray
+    
+    structure_points: np.ndarray
+    strong_candle_count: np.ndarray      # candles com strength >= 70
+    chart_timeframes: np.ndarray         # TFs com padrão gráfico confidence >= 65
+    volume_available: np.ndarray
+    volume_trend_confirmation: np.ndarray
+    volume_ratio: np.ndarray
+    movement_strong: np.ndarray
+    
+    volatility_points: np.ndarray
+    liquidity_score: np.ndarray
+    has_risk: np.ndarray
+    current_drawdown_pct: np.ndarray
+    exposure_pct: np.ndarray
+    potential_profit: np.ndarray
+    potential_loss: np.ndarray
+    
+    session_favorable: np.ndarray
+    day_quality: np.ndarray
+    has_learning: np.ndarray
+    similar_pattern_winrate: np.ndarray
+    recent_consecutive_losses: np.ndarray
+    
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "BatchInput":
+        """
+        Converte registros {market_analysis, pattern_analysis, risk_analysis,
+        learning_insights} no layout SoA.
+        """
+        rows = []
+        for record in records:
+            ma = record.get("market_analysis") or {}
+            pa = record.get("pattern_analysis") or {}
+            ra = record.get("risk_analysis")
+            li = record.get("learning_insights")
+            
+            trend = ma.get("trend", _EMPTY)
+            consensus = _g(trend, "consensus")
+            momentum = ma.get("momentum", _EMPTY)
+            volume = ma.get("volume", _EMPTY)
+            candle_strengths, chart_best = _flatten_patterns(pa)
+            
+            rows.append((
+                consensus.get("direction", "NEUTRAL") in ("BULLISH", "BEARISH"),
+                consensus.get("strength", 0),
+                bool(_g(trend, "h1").get("ema_alignment", False)),
+                momentum.get("score", 0),
+                momentum.get("direction", "NEUTRAL") != "NEUTRAL",
+                _MOMENTUM_STRENGTH.get(momentum.get("strength", "WEAK"), 0.0),
+                _STRUCT_SCORE.get(ma.get("structure", _EMPTY).get("type", "NEUTRAL"), 0.0),
+                int((candle_strengths >= 70).sum()),
+                int((chart_best >= 65).sum()),
+                bool(volume.get("available", False)),
+                bool(volume.get("trend_confirmation", False)),
+                volume.get("volume_ratio", 1.0),
+                ma.get("movement_quality", _EMPTY).get("classification") == "STRONG",
+                _VOL_SCORE.get(ma.get("volatility", _EMPTY).get("classification", "MUITO_ALTA"), 1.0),
+                ma.get("liquidity", _EMPTY).get("score", 0),
+                bool(ra),
+                ra.get("current_drawdown_pct", 0) if ra else 0.0,
+                ra.get("exposure_pct", 0) if ra else 0.0,
+                ra.get("potential_profit", 0) if ra else 0.0,
+                ra.get("potential_loss", 0) if ra else 0.0,
+                bool(ma.get("session", _EMPTY).get("is_favorable", False)),
+                ma.get("temporal_context", _EMPTY).get("day_quality", 50),
+                bool(li),
+                li.get("similar_pattern_winrate", 50) if li else 50.0,
+                li.get("recent_consecutive_losses", 0) if li else 0.0,
+            ))
+        
+        columns = list(zip(*rows)) if rows else [()] * len(fields(cls))
+        arrays = {}
+        for f, column in zip(fields(cls), columns):
+            dtype = np.bool_ if f.name in _BATCH_BOOL_FIELDS else np.float64
+            arrays[f.name] = np.array(column, dtype=dtype)
+        return cls(**arrays)
+
+
 class ScoreEngine:
     """
     Motor de pontuação profissional para decisões de trading.
     Avalia qualidade de setup com múltiplos critérios ponderados.
     """
     
-    def __init__(self, custom_weights: Dict = None):
+    def __init__(self, custom_weights: Dict = None, record_history: bool = True):
         """
         Inicializa engine com pesos personalizados opcionais.
         
         Args:
             custom_weights: Dict com pesos customizados (opcional)
+            record_history: Registrar scores em score_history (desligar em backtests)
         """
         if custom_weights:
             self.weights = ScoreWeights(**custom_weights)
         else:
             self.weights = ScoreWeights()
         
-        self.score_history = []
+        # Máximo de cada componente e recíprocos (confiança usa multiplicação)
+        self._max_per_component = {
+            "trend": 25.0, "momentum": 20.0, "confirmations": 25.0, "risk": 20.0, "context": 10.0
+        }
+        self._inv_max = tuple(1.0 / v for v in self._max_per_component.values())
+        
+        # Ring buffer: memória constante em sessões longas
+        self.score_history = deque(maxlen=10000)
+        self.record_history = record_history
+        
+        # Timestamps do histórico são monotônicos; referência para hora de parede
+        self._epoch_wall = time.time()
+        self._epoch_monotonic = time.monotonic()
+        
+        # Distribuição incremental (get_score_distribution em O(1))
+        self._count_execute = 0
+        self._count_alert = 0
+        self._count_no_trade = 0
+        self._score_sum = 0.0
+        
+        # Memo LRU: fingerprint das entradas -> (ScoreResult, score bruto)
+        self._memo: OrderedDict = OrderedDict()
+        self._memo_size = 1024
         
         # Thresholds
         self.THRESHOLD_NO_TRADE = 65
         self.THRESHOLD_ALERT = 90
         self.MIN_RISK_REWARD = 1.5
+        
+        # Aquece o JIT fora do caminho crítico
+        if NUMBA_ENABLED:
+            _confirmations_kernel(np.zeros(1), np.zeros(1))
     
     def calculate_comprehensive_score(
         self,
         market_analysis: Dict,
         pattern_analysis: Dict,
         risk_analysis: Dict,
-        learning_insights: Dict = None
+        learning_insights: Dict = None,
+        fast_reject: bool = False
     ) -> ScoreResult:
         """
         Calcula score completo considerando todas as análises.
+        Entradas repetidas (mesmo fingerprint) são servidas do memo LRU.
+        
+        Args:
+            fast_reject: Interrompe o cálculo assim que o score máximo
+                atingível fica abaixo de THRESHOLD_NO_TRADE (backtests).
+                Componentes não calculados ficam em 0.0.
         
         Returns:
             ScoreResult com pontuação total e detalhes
         """
+        try:
+            key = (fast_reject, self._fingerprint(
+                market_analysis, pattern_analysis, risk_analysis, learning_insights
+            ))
+            cached = self._memo.get(key)
+        except TypeError:
+            # Valor não-hashable nas entradas: calcula sem memo
+            key, cached = None, None
+        
+        if cached is not None:
+            self._memo.move_to_end(key)
+            result, total_score = cached
+            # Cópia: chamadores podem mutar listas/dict do resultado
+            result = replace(
+                result,
+                components=dict(result.components),
+                reasons=list(result.reasons),
+                warnings=list(result.warnings)
+            )
+        else:
+            result, total_score = self._compute_score(
+                market_analysis, pattern_analysis, risk_analysis, learning_insights, fast_reject
+            )
+            if key is not None:
+                self._memo[key] = (replace(
+                    result,
+                    components=dict(result.components),
+                    reasons=list(result.reasons),
+                    warnings=list(result.warnings)
+                ), total_score)
+                if len(self._memo) > self._memo_size:
+                    self._memo.popitem(last=False)
+        
+        if self.record_history:
+            self._record_history(total_score, result.recommendation)
         
-        components = {}
-        reasons = []
-        warnings = []
-        
-        # ═══════════════════════════════════
-        # 1. TENDÊNCIA (25 pontos)
-        # ═══════════════════════════════════
-        trend_score = self._score_trend(market_analysis)
-        components["trend"] = trend_score
-        
-        if trend_score >= 20:
-            reasons.append(f"Tendência forte e clara ({trend_score:.1f}/25)")
-        elif trend_score < 10:
-            warnings.append("Tendência fraca ou indefinida")
-        
-        # ═══════════════════════════════════
-        # 2. FORÇA DO MOVIMENTO (20 pontos)
-        # ═══════════════════════════════════
-        momentum_score = self._score_momentum(market_analysis)
-        components["momentum"] = momentum_score
-        
-        if momentum_score >= 15:
-            reasons.append(f"Momentum forte ({momentum_score:.1f}/20)")
-        elif momentum_score < 8:
-            warnings.append("Momentum fraco")
+        return result
+    
+    def _record_history(self, total_score: float, recommendation: str):
+        """
+        Registra score no histórico e atualiza contadores da distribuição.
+        """
+        # Buffer cheio: o mais antigo sai da distribuição junto com o deque
+        if len(self.score_history) == self.score_history.maxlen:
+            evicted = self.score_history[0]["score"]
+            if evicted >= self.THRESHOLD_ALERT:
+                self._count_execute -= 1
+            elif evicted >= self.THRESHOLD_NO_TRADE:
+                self._count_alert -= 1
+            else:
+                self._count_no_trade -= 1
+            self._score_sum -= evicted
         
-        # ═══════════════════════════════════
-        # 3. CONFIRMAÇÕES TÉCNICAS (25 pontos)
-        # ═══════════════════════════════════
-        confirmation_score = self._score_confirmations(market_analysis, pattern_analysis)
-        components["confirmations"] = confirmation_score
+        self.score_history.append({
+            "timestamp": time.monotonic(),
+            "score": total_score,
+            "recommendation": recommendation
+        })
         
-        if confirmation_score >= 20:
-            reasons.append(f"Múltiplas confirmações técnicas ({confirmation_score:.1f}/25)")
-        elif confirmation_score < 10:
-            warnings.append("Poucas confirmações técnicas")
+        if total_score >= self.THRESHOLD_ALERT:
+            self._count_execute += 1
+        elif total_score >= self.THRESHOLD_NO_TRADE:
+            self._count_alert += 1
+        else:
+            self._count_no_trade += 1
+        self._score_sum += total_score
+    
+    def _compute_score(
+        self,
+        market_analysis: Dict,
+        pattern_analysis: Dict,
+        risk_analysis: Dict,
+        learning_insights: Dict = None,
+        fast_reject: bool = False
+    ) -> Tuple[ScoreResult, float]:
+        """
+        Calcula os cinco componentes, penalizações e recomendação.
         
+        Returns:
+            (ScoreResult, score total antes da conversão para int)
+        """
         # ═══════════════════════════════════
-        # 4. QUALIDADE DE RISCO (20 pontos)
-        # ═══════════════════════════════════
-        risk_score = self._score_risk_quality(market_analysis, risk_analysis)
-        components["risk"] = risk_score
-        
-        if risk_score >= 15:
-            reasons.append(f"Risco controlado e favorável ({risk_score:.1f}/20)")
-        elif risk_score < 8:
-            warnings.append("Risco desfavorável")
+        # COMPONENTES (tendência 25, momentum 20, confirmações 25,
+        # risco 20, contexto 10). Com fast_reject, ordem crescente de custo
+        # e parada assim que o máximo atingível fica abaixo do limiar
+        # (penalizações só reduzem o score).
+        # ═══════════════════════════════════
+        order = _FAST_REJECT_ORDER if fast_reject else _COMPONENT_ORDER
+        scores = {}
+        upper_bound = sum(self._max_per_component.values())
+        
+        for name in order:
+            scores[name] = self._score_component(
+                name, market_analysis, pattern_analysis, risk_analysis, learning_insights
+            )
+            if fast_reject:
+                upper_bound -= self._max_per_component[name] - scores[name]
+                if upper_bound < self.THRESHOLD_NO_TRADE:
+                    break
+        
+        # Componentes, razões e avisos sempre na ordem canônica
+        components = {}
+        reasons = []
+        warnings = []
         
-        # ═══════════════════════════════════
-        # 5. CONTEXTO TEMPORAL E HISTÓRICO (10 pontos)
-        # ═══════════════════════════════════
-        context_score = self._score_context(market_analysis, learning_insights)
-        components["context"] = context_score
+        for name in _COMPONENT_ORDER:
+            if name not in scores:
+                components[name] = 0.0
+                continue
+            
+            value = scores[name]
+            components[name] = value
+            
+            reason_min, reason_fmt, warning_max, warning = _COMPONENT_NOTES[name]
+            if value >= reason_min:
+                reasons.append(reason_fmt.format(value))
+            elif value < warning_max:
+                warnings.append(warning)
         
-        if context_score >= 8:
-            reasons.append(f"Contexto favorável ({context_score:.1f}/10)")
-        elif context_score < 4:
-            warnings.append("Contexto desfavorável")
+        if len(scores) < len(_COMPONENT_ORDER):
+            return self._early_reject(components, reasons, warnings, upper_bound, risk_analysis)
         
         # ═══════════════════════════════════
         # SCORE TOTAL
@@ -152,7 +443,8 @@ class ScoreEngine:
         # PENALIZAÇÃO SE RISCO > RETORNO
         # ═══════════════════════════════════
         risk_reward = self._calculate_risk_reward(risk_analysis)
-        if risk_reward < self.MIN_RISK_REWARD:
+        critical_rr = risk_reward < self.MIN_RISK_REWARD
+        if critical_rr:
             penalty = 15
             total_score -= penalty
             warnings.append(f"Risco/Retorno desfavorável: {risk_reward:.2f} < {self.MIN_RISK_REWARD}")
@@ -165,7 +457,7 @@ class ScoreEngine:
         # ═══════════════════════════════════
         # RECOMENDAÇÃO
         # ═══════════════════════════════════
-        recommendation = self._determine_recommendation(total_score, warnings)
+        recommendation = self._determine_recommendation(total_score, critical_rr)
         
         # ═══════════════════════════════════
         # CONFIANÇA
@@ -182,13 +474,191 @@ class ScoreEngine:
             confidence=confidence
         )
         
-        self.score_history.append({
-            "timestamp": datetime.now(),
-            "score": total_score,
-            "recommendation": recommendation
-        })
+        return result, total_score
+    
+    def calculate_batch_score(self, batch: BatchInput) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score de N setups de uma vez (backtests), com as mesmas fórmulas do
+        caminho escalar vetorizadas em NumPy. Não grava score_history.
         
-        return result
+        Args:
+            batch: BatchInput (ver BatchInput.from_records)
+        
+        Returns:
+            (componentes (N,5) na ordem trend/momentum/confirmations/risk/context,
+             score total (N,) limitado a 0-100)
+        """
+        b = batch
+        
+        # 1. Tendência
+        trend = np.where(b.trend_directional, 10.0 + (b.trend_strength / 100) * 10.0, 2.0)
+        trend = np.minimum(trend + np.where(b.h1_ema_aligned, 5.0, 0.0), 25.0)
+        
+        # 2. Momentum
+        momentum = (b.momentum_score / 100) * 12.0
+        momentum = momentum + np.where(b.momentum_directional, 4.0, 0.0)
+        momentum = np.minimum(momentum + b.momentum_strength_points, 20.0)
+        
+        # 3. Confirmações
+        volume_points = np.where(
+            b.volume_available,
+            np.where(b.volume_trend_confirmation, 4.0, np.where(b.volume_ratio > 1.3, 2.0, 0.0)),
+            0.0
+        )
+        confirmations = (
+            b.structure_points
+            + np.minimum(b.strong_candle_count * 3.0, 9.0)
+            + b.chart_timeframes * 4.0
+            + volume_points
+            + np.where(b.movement_strong, 3.0, 0.0)
+        )
+        confirmations = np.minimum(confirmations, 25.0)
+        
+        # 4. Qualidade de risco
+        risk = b.volatility_points + (b.liquidity_score / 100) * 6.0
+        drawdown_points = np.select(
+            [b.current_drawdown_pct < 5, b.current_drawdown_pct < 10], [4.0, 2.0], 0.0
+        )
+        exposure_points = np.select([b.exposure_pct < 30, b.exposure_pct < 50], [4.0, 2.0], 0.0)
+        risk = risk + np.where(b.has_risk, drawdown_points, 0.0)
+        risk = np.minimum(risk + np.where(b.has_risk, exposure_points, 0.0), 20.0)
+        
+        # 5. Contexto
+        context = np.where(b.session_favorable, 4.0, 1.0)
+        context = context + np.select(
+            [b.day_quality >= 80, b.day_quality >= 70, b.day_quality >= 50], [3.0, 2.0, 1.0], 0.0
+        )
+        winrate = b.similar_pattern_winrate
+        learning_points = np.select([winrate >= 60, winrate >= 50], [3.0, 1.5], 0.0)
+        context = np.minimum(context + np.where(b.has_learning, learning_points, 0.0), 10.0)
+        
+        components = np.column_stack((trend, momentum, confirmations, risk, context))
+        total = trend + momentum + confirmations + risk + context
+        
+        # Penalização por histórico negativo
+        penalty = np.select([winrate < 40, winrate < 45], [15.0, 10.0], 0.0)
+        losses = b.recent_consecutive_losses
+        penalty = penalty + np.select([losses >= 3, losses >= 2], [10.0, 5.0], 0.0)
+        total = total - np.where(b.has_learning, penalty, 0.0)
+        
+        # Penalização se risco > retorno
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.abs(b.potential_profit / b.potential_loss)
+        risk_reward = np.where(b.has_risk, np.where(b.potential_loss == 0, 0.0, ratio), 1.0)
+        total = total - np.where(risk_reward < self.MIN_RISK_REWARD, 15.0, 0.0)
+        
+        return components, np.clip(total, 0, 100)
+    
+    def _score_component(
+        self,
+        name: str,
+        market_analysis: Dict,
+        pattern_analysis: Dict,
+        risk_analysis: Dict,
+        learning_insights: Dict
+    ) -> float:
+        """
+        Calcula um componente do score pelo nome.
+        """
+        if name == "trend":
+            return self._score_trend(market_analysis)
+        if name == "momentum":
+            return self._score_momentum(market_analysis)
+        if name == "confirmations":
+            return self._score_confirmations(market_analysis, pattern_analysis)
+        if name == "risk":
+            return self._score_risk_quality(market_analysis, risk_analysis)
+        return self._score_context(market_analysis, learning_insights)
+    
+    def _early_reject(
+        self,
+        components: Dict,
+        reasons: List[str],
+        warnings: List[str],
+        upper_bound: float,
+        risk_analysis: Dict
+    ) -> Tuple[ScoreResult, float]:
+        """
+        Resultado NO_TRADE quando o score máximo atingível já é insuficiente.
+        Componentes não calculados chegam com 0.0.
+        """
+        total_score = max(0, min(100, sum(components.values())))
+        warnings.append(
+            f"Rejeição antecipada: máximo atingível {upper_bound:.1f} < {self.THRESHOLD_NO_TRADE}"
+        )
+        
+        result = ScoreResult(
+            total_score=int(total_score),
+            components=components,
+            recommendation=_NO_TRADE,
+            reasons=reasons,
+            warnings=warnings,
+            risk_reward_ratio=self._calculate_risk_reward(risk_analysis),
+            confidence=0.0
+        )
+        return result, total_score
+    
+    @staticmethod
+    def _fingerprint(
+        market_analysis: Dict,
+        pattern_analysis: Dict,
+        risk_analysis: Dict,
+        learning_insights: Dict
+    ) -> Tuple:
+        """
+        Chave do memo: apenas os campos lidos pelos _score_* (mesmos defaults).
+        """
+        trend = market_analysis.get("trend", _EMPTY)
+        consensus = _g(trend, "consensus")
+        momentum = market_analysis.get("momentum", _EMPTY)
+        volume = market_analysis.get("volume", _EMPTY)
+        
+        candle_patterns = pattern_analysis.get("candle_patterns", _EMPTY)
+        chart_patterns = pattern_analysis.get("chart_patterns", _EMPTY)
+        
+        risk_key = None
+        if risk_analysis:
+            risk_key = (
+                risk_analysis.get("current_drawdown_pct", 0),
+                risk_analysis.get("exposure_pct", 0),
+                risk_analysis.get("potential_profit", 0),
+                risk_analysis.get("potential_loss", 0),
+            )
+        
+        learning_key = None
+        if learning_insights:
+            learning_key = (
+                learning_insights.get("similar_pattern_winrate", 50),
+                learning_insights.get("recent_consecutive_losses", 0),
+            )
+        
+        return (
+            consensus.get("direction", "NEUTRAL"),
+            consensus.get("strength", 0),
+            _g(trend, "h1").get("ema_alignment", False),
+            momentum.get("score", 0),
+            momentum.get("direction", "NEUTRAL"),
+            momentum.get("strength", "WEAK"),
+            market_analysis.get("structure", _EMPTY).get("type", "NEUTRAL"),
+            tuple(
+                tuple(p.get("strength", 0) for p in patterns)
+                for patterns in candle_patterns.values()
+            ),
+            tuple(
+                tuple(p.get("confidence", 0) for p in patterns)
+                for patterns in chart_patterns.values()
+            ),
+            volume.get("available", False),
+            volume.get("trend_confirmation", False),
+            volume.get("volume_ratio", 1.0),
+            market_analysis.get("movement_quality", _EMPTY).get("classification"),
+            market_analysis.get("volatility", _EMPTY).get("classification", "MUITO_ALTA"),
+            market_analysis.get("liquidity", _EMPTY).get("score", 0),
+            market_analysis.get("session", _EMPTY).get("is_favorable", False),
+            market_analysis.get("temporal_context", _EMPTY).get("day_quality", 50),
+            risk_key,
+            learning_key,
+        )
     
     def _score_trend(self, market_analysis: Dict) -> float:
         """
@@ -197,10 +667,10 @@ class ScoreEngine:
         score = 0.0
         max_score = 25.0
         
-        trend = market_analysis.get("trend", {})
+        trend = market_analysis.get("trend", _EMPTY)
         
         # Consenso entre timeframes
-        consensus = trend.get("consensus", {})
+        consensus = trend.get("consensus", _EMPTY)
         consensus_direction = consensus.get("direction", "NEUTRAL")
         consensus_strength = consensus.get("strength", 0)
         
@@ -215,7 +685,7 @@ class ScoreEngine:
             score += 2.0
         
         # Alinhamento de EMAs
-        h1_trend = trend.get("h1", {})
+        h1_trend = trend.get("h1", _EMPTY)
         if h1_trend.get("ema_alignment", False):
             score += 5.0
         
@@ -228,7 +698,7 @@ class ScoreEngine:
         score = 0.0
         max_score = 20.0
         
-        momentum = market_analysis.get("momentum", {})
+        momentum = market_analysis.get("momentum", _EMPTY)
         
         # Score do momentum
         momentum_score = momentum.get("score", 0)
@@ -241,10 +711,7 @@ class ScoreEngine:
         
         # Força
         strength = momentum.get("strength", "WEAK")
-        if strength == "STRONG":
-            score += 4.0
-        elif strength == "MODERATE":
-            score += 2.0
+        score += _MOMENTUM_STRENGTH.get(strength, 0.0)
         
         return min(score, max_score)
     
@@ -258,18 +725,48 @@ class ScoreEngine:
         # ═══════════════════════════════════
         # Estrutura de mercado
         # ═══════════════════════════════════
-        structure = market_analysis.get("structure", {})
+        structure = market_analysis.get("structure", _EMPTY)
         structure_type = structure.get("type", "NEUTRAL")
         
-        if structure_type in ["HIGHER_HIGH", "LOWER_LOW"]:
-            score += 5.0
-        elif structure_type in ["HIGHER_LOW", "LOWER_HIGH"]:
+        score += _STRUCT_SCORE.get(structure_type, 0.0)
+        
+        # ═══════════════════════════════════
+        # Padrões de candle e de gráfico
+        # ═══════════════════════════════════
+        if NUMBA_ENABLED:
+            score += _confirmations_kernel(*_flatten_patterns(pattern_analysis))
+        else:
+            score += self._score_patterns_py(pattern_analysis)
+        
+        # ═══════════════════════════════════
+        # Volume confirmando
+        # ═══════════════════════════════════
+        volume = market_analysis.get("volume", _EMPTY)
+        if volume.get("available", False):
+            if volume.get("trend_confirmation", False):
+                score += 4.0
+            elif volume.get("volume_ratio", 1.0) > 1.3:
+                score += 2.0
+        
+        # ═══════════════════════════════════
+        # Qualidade do movimento
+        # ═══════════════════════════════════
+        movement = market_analysis.get("movement_quality", _EMPTY)
+        if movement.get("classification") == "STRONG":
             score += 3.0
         
+        return min(score, max_score)
+    
+    def _score_patterns_py(self, pattern_analysis: Dict) -> float:
+        """
+        Pontos de padrões candle/gráfico (fallback Python sem Numba).
+        """
+        score = 0.0
+        
         # ═══════════════════════════════════
         # Padrões de candle
         # ═══════════════════════════════════
-        candle_patterns = pattern_analysis.get("candle_patterns", {})
+        candle_patterns = pattern_analysis.get("candle_patterns", _EMPTY)
         
         strong_patterns = 0
         for tf, patterns in candle_patterns.items():
@@ -282,7 +779,7 @@ class ScoreEngine:
         # ═══════════════════════════════════
         # Padrões de gráfico
         # ═══════════════════════════════════
-        chart_patterns = pattern_analysis.get("chart_patterns", {})
+        chart_patterns = pattern_analysis.get("chart_patterns", _EMPTY)
         
         for tf, patterns in chart_patterns.items():
             for pattern in patterns:
@@ -290,24 +787,7 @@ class ScoreEngine:
                     score += 4.0
                     break  # Máximo 1 por timeframe
         
-        # ═══════════════════════════════════
-        # Volume confirmando
-        # ═══════════════════════════════════
-        volume = market_analysis.get("volume", {})
-        if volume.get("available", False):
-            if volume.get("trend_confirmation", False):
-                score += 4.0
-            elif volume.get("volume_ratio", 1.0) > 1.3:
-                score += 2.0
-        
-        # ═══════════════════════════════════
-        # Qualidade do movimento
-        # ═══════════════════════════════════
-        movement = market_analysis.get("movement_quality", {})
-        if movement.get("classification") == "STRONG":
-            score += 3.0
-        
-        return min(score, max_score)
+        return score
     
     def _score_risk_quality(self, market_analysis: Dict, risk_analysis: Dict) -> float:
         """
@@ -319,22 +799,16 @@ class ScoreEngine:
         # ═══════════════════════════════════
         # Volatilidade
         # ═══════════════════════════════════
-        volatility = market_analysis.get("volatility", {})
+        volatility = market_analysis.get("volatility", _EMPTY)
         vol_classification = volatility.get("classification", "MUITO_ALTA")
         
-        if vol_classification == "NORMAL":
-            score += 6.0
-        elif vol_classification == "ALTA":
-            score += 4.0
-        elif vol_classification == "BAIXA":
-            score += 3.0
-        else:  # MUITO_ALTA
-            score += 1.0
+        # Classificação desconhecida é tratada como MUITO_ALTA
+        score += _VOL_SCORE.get(vol_classification, 1.0)
         
         # ═══════════════════════════════════
         # Liquidez
         # ═══════════════════════════════════
-        liquidity = market_analysis.get("liquidity", {})
+        liquidity = market_analysis.get("liquidity", _EMPTY)
         liquidity_score = liquidity.get("score", 0)
         score += (liquidity_score / 100) * 6.0
         
@@ -372,7 +846,7 @@ class ScoreEngine:
         # ═══════════════════════════════════
         # Sessão de mercado
         # ═══════════════════════════════════
-        session = market_analysis.get("session", {})
+        session = market_analysis.get("session", _EMPTY)
         if session.get("is_favorable", False):
             score += 4.0
         else:
@@ -381,7 +855,7 @@ class ScoreEngine:
         # ═══════════════════════════════════
         # Dia da semana
         # ═══════════════════════════════════
-        temporal = market_analysis.get("temporal_context", {})
+        temporal = market_analysis.get("temporal_context", _EMPTY)
         day_quality = temporal.get("day_quality", 50)
         
         if day_quality >= 80:
@@ -441,32 +915,37 @@ class ScoreEngine:
         
         return abs(potential_profit / potential_loss)
     
-    def _determine_recommendation(self, score: float, warnings: List[str]) -> str:
+    def _determine_recommendation(self, score: float, critical_flag: bool) -> str:
         """
         Determina recomendação baseada no score.
-        """
-        # Warnings críticos bloqueiam execução
-        critical_warnings = [w for w in warnings if "Risco/Retorno desfavorável" in w]
         
-        if score >= self.THRESHOLD_ALERT and not critical_warnings:
-            return "EXECUTE"
+        Args:
+            critical_flag: Risco/Retorno desfavorável (bloqueia execução)
+        """
+        if score >= self.THRESHOLD_ALERT and not critical_flag:
+            return _EXECUTE
         elif score >= self.THRESHOLD_NO_TRADE:
-            return "ALERT_ONLY"
+            return _ALERT_ONLY
         else:
-            return "NO_TRADE"
+            return _NO_TRADE
     
     def _calculate_confidence(self, components: Dict, warnings: List[str]) -> float:
         """
         Calcula nível de confiança (0-100).
         """
-        # Base: consistência entre componentes
-        values = list(components.values())
-        expected_values = [25, 20, 25, 20, 10]  # Max de cada componente
-        
-        normalized = [v / e for v, e in zip(values, expected_values)]
-        
-        # Desvio padrão (menor = mais consistente)
-        std = np.std(normalized)
+        # Base: consistência entre componentes (normalizados pelo máximo de cada)
+        i0, i1, i2, i3, i4 = self._inv_max
+        n0 = components["trend"] * i0
+        n1 = components["momentum"] * i1
+        n2 = components["confirmations"] * i2
+        n3 = components["risk"] * i3
+        n4 = components["context"] * i4
+        
+        # Desvio padrão populacional (menor = mais consistente); escalar puro,
+        # sem alocação de array para 5 valores
+        m = (n0 + n1 + n2 + n3 + n4) / 5
+        d0, d1, d2, d3, d4 = n0 - m, n1 - m, n2 - m, n3 - m, n4 - m
+        std = math.sqrt((d0 * d0 + d1 * d1 + d2 * d2 + d3 * d3 + d4 * d4) / 5)
         consistency_score = max(0, 100 - (std * 100))
         
         # Penalização por warnings
@@ -476,6 +955,12 @@ class ScoreEngine:
         
         return max(0, min(100, confidence))
     
+    def history_wall_time(self, entry: Dict) -> float:
+        """
+        Converte o timestamp monotônico de uma entrada do histórico em epoch (s).
+        """
+        return self._epoch_wall + (entry["timestamp"] - self._epoch_monotonic)
+    
     def get_score_distribution(self) -> Dict:
         """
         Retorna distribuição de scores históricos.
@@ -488,44 +973,45 @@ class ScoreEngine:
                 "average_score": 0
             }
         
-        scores = [s["score"] for s in self.score_history]
+        total = len(self.score_history)
         
         return {
-            "execute": sum(1 for s in scores if s >= self.THRESHOLD_ALERT),
-            "alert": sum(1 for s in scores if self.THRESHOLD_NO_TRADE <= s < self.THRESHOLD_ALERT),
-            "no_trade": sum(1 for s in scores if s < self.THRESHOLD_NO_TRADE),
-            "average_score": np.mean(scores),
-            "total_evaluations": len(scores)
+            "execute": self._count_execute,
+            "alert": self._count_alert,
+            "no_trade": self._count_no_trade,
+            "average_score": self._score_sum / total,
+            "total_evaluations": total
         }
     
     def explain_score(self, score_result: ScoreResult) -> str:
         """
         Gera explicação detalhada do score.
         """
-        explanation = []
+        buf = io.StringIO()
+        w = buf.write
         
-        explanation.append(f"═══════════════════════════════════════")
-        explanation.append(f"SCORE TOTAL: {score_result.total_score}/100")
-        explanation.append(f"RECOMENDAÇÃO: {score_result.recommendation}")
-        explanation.append(f"CONFIANÇA: {score_result.confidence:.1f}%")
-        explanation.append(f"═══════════════════════════════════════")
+        w(_EXPLAIN_HEADER.format_map({
+            "total_score": score_result.total_score,
+            "recommendation": score_result.recommendation,
+            "confidence": score_result.confidence,
+        }))
         
-        explanation.append(f"\n📊 COMPONENTES:")
+        w("\n\n📊 COMPONENTES:")
         for name, value in score_result.components.items():
-            explanation.append(f"  {name.upper():.<20} {value:.1f}")
+            w(f"\n  {name.upper():.<20} {value:.1f}")
         
-        explanation.append(f"\n✅ RAZÕES:")
+        w("\n\n✅ RAZÕES:")
         for reason in score_result.reasons:
-            explanation.append(f"  • {reason}")
+            w(f"\n  • {reason}")
         
         if score_result.warnings:
-            explanation.append(f"\n⚠️  AVISOS:")
+            w("\n\n⚠️  AVISOS:")
             for warning in score_result.warnings:
-                explanation.append(f"  • {warning}")
+                w(f"\n  • {warning}")
         
-        explanation.append(f"\n💰 Risco/Retorno: {score_result.risk_reward_ratio:.2f}")
+        w(f"\n\n💰 Risco/Retorno: {score_result.risk_reward_ratio:.2f}")
         
-        return "\n".join(explanation)
+        return buf.getvalue()
 
 
 if __name__ == "__main__":
@@ -6,15 +6,25 @@ O bot avalia a si mesmo diariamente e ajusta autonomamente.
 """
 
 import json
+import math
 import os
+from collections import deque
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from typing import Dict, List, Optional, Tuple
 import numpy as np
 from core.logger import get_logger
 
+try:
+    import orjson
+    ORJSON_ENABLED = True
+except ImportError:
+    ORJSON_ENABLED = False
 
-@dataclass
+from core._numba_compat import njit, NUMBA_ENABLED
+
+
+@dataclass(slots=True, frozen=True)
 class DailyPerformance:
     """Performance diária do bot"""
     date: str
@@ -27,11 +37,83 @@ class DailyPerformance:
     sharpe_ratio: float
     entry_quality: float  # 0-100
     risk_adjusted_return: float
-    timestamp: str = None
-    
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.now().isoformat()
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+
+
+# Janelas (em dias) das médias de adjust_* / get_evaluation_summary
+_WINDOWS = (3, 5, 7)
+_WINDOW_FIELDS = ("win_rate", "expectancy", "max_drawdown")
+
+# Posição de cada componente no vetor de pesos
+_W_IDX = {"trend": 0, "momentum": 1, "confirmations": 2, "risk_quality": 3, "context": 4}
+
+
+def _mean(values) -> float:
+    """Média de listas curtas (3-7 itens) sem o overhead do NumPy."""
+    return sum(values) / len(values) if values else 0.0
+
+
+@njit(cache=True, nogil=True)
+def _welford(pnls: np.ndarray) -> Tuple[float, float]:
+    """
+    Média e variância populacional em uma passada (Welford).
+    """
+    mean = 0.0
+    m2 = 0.0
+    n = 0
+    for x in pnls:
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+    if n == 0:
+        return 0.0, 0.0
+    return mean, m2 / n
+
+
+@njit(cache=True, nogil=True)
+def _max_drawdown(pnls: np.ndarray) -> float:
+    """
+    Drawdown máximo relativo ao pico do PnL acumulado (pico inicial 0),
+    em uma passada e sem arrays intermediários.
+    """
+    cumulative = 0.0
+    peak = 0.0
+    max_drawdown = 0.0
+    for pnl in pnls:
+        cumulative += pnl
+        if cumulative > peak:
+            peak = cumulative
+        elif peak > 0:
+            drawdown = (peak - cumulative) / peak
+            if drawdown > max_drawdown:
+                max_drawdown = drawdown
+    return max_drawdown
+
+
+def _max_drawdown_numpy(pnls: np.ndarray) -> float:
+    """Fallback sem Numba de _max_drawdown."""
+    cumulative = np.cumsum(pnls)
+    peak = np.maximum(np.maximum.accumulate(cumulative), 0.0)
+    positive_peak = peak > 0
+    if not positive_peak.any():
+        return 0.0
+    return float(((peak[positive_peak] - cumulative[positive_peak]) / peak[positive_peak]).max())
+
+
+def _mean_var_numpy(pnls: np.ndarray) -> Tuple[float, float]:
+    """Fallback sem Numba de _welford."""
+    return float(pnls.mean()), float(pnls.var())
+
+
+def _trades_to_arrays(trades) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extrai pnl e risco dos trades em arrays paralelos (SoA), numa passada cada.
+    """
+    n = len(trades)
+    pnls = np.fromiter((t.pnl for t in trades), dtype=np.float64, count=n)
+    risks = np.fromiter((t.risk for t in trades), dtype=np.float64, count=n)
+    return pnls, risks
 
 
 class SelfEvaluator:
@@ -47,19 +129,19 @@ class SelfEvaluator:
         self.performance_history: List[DailyPerformance] = []
         self.adjustment_history: List[Dict] = []
         
+        # Últimos valores por janela: {n: {campo: deque(maxlen=n)}}
+        self._windows = {
+            n: {name: deque(maxlen=n) for name in _WINDOW_FIELDS} for n in _WINDOWS
+        }
+        self._windows_len = 0
+        
         # Limites de performance
         self.min_acceptable_winrate = 0.50
         self.min_acceptable_ev = 0.1
         self.max_acceptable_drawdown = 0.15
         
-        # Pesos ajustáveis
-        self.current_weights = {
-            "trend": 0.25,
-            "momentum": 0.20,
-            "confirmations": 0.25,
-            "risk_quality": 0.20,
-            "context": 0.10
-        }
+        # Pesos ajustáveis (ordem de _W_IDX); current_weights expõe como dict
+        self._weights_arr = np.array([0.25, 0.20, 0.25, 0.20, 0.10])
         
         # Frequência de operação
         self.base_trades_per_day = 10
@@ -86,46 +168,37 @@ class SelfEvaluator:
         if not trades:
             return None
         
-        # Cálculos
-        total = len(trades)
-        winners = sum(1 for t in trades if t.pnl > 0)
-        losers = sum(1 for t in trades if t.pnl < 0)
-        win_rate = winners / total if total > 0 else 0
+        # Cálculos vetorizados sobre pnl/risco
+        pnls, risks = _trades_to_arrays(trades)
+        total = len(pnls)
+        winners = int(np.count_nonzero(pnls > 0))
+        losers = int(np.count_nonzero(pnls < 0))
+        win_rate = winners / total
         
         # Expectancy (EV)
-        total_pnl = sum(t.pnl for t in trades)
-        expectancy = total_pnl / total if total > 0 else 0
-        
-        # Drawdown
-        cumulative_pnl = 0
-        max_drawdown = 0
-        peak = 0
-        for trade in trades:
-            cumulative_pnl += trade.pnl
-            if cumulative_pnl > peak:
-                peak = cumulative_pnl
-            else:
-                dd = (peak - cumulative_pnl) / peak if peak > 0 else 0
-                max_drawdown = max(max_drawdown, dd)
-        
-        # Qualidade de entradas (baseado em risk/reward)
-        entry_qualities = []
-        for trade in trades:
-            if trade.risk > 0:
-                rr = trade.pnl / trade.risk if trade.pnl != 0 else 0
-                eq = min(100, max(0, (rr + 1) * 25))  # Scale 0-100
-                entry_qualities.append(eq)
-        entry_quality = np.mean(entry_qualities) if entry_qualities else 0
+        total_pnl = float(pnls.sum())
+        expectancy = total_pnl / total
+        
+        # Drawdown relativo ao pico do PnL acumulado (pico inicial 0)
+        max_drawdown = float(_max_drawdown(pnls) if NUMBA_ENABLED else _max_drawdown_numpy(pnls))
+        
+        # Qualidade de entradas (baseado em risk/reward), escala 0-100
+        with_risk = risks > 0
+        if with_risk.any():
+            rr = pnls[with_risk] / risks[with_risk]
+            entry_quality = float(np.clip((rr + 1) * 25, 0, 100).mean())
+        else:
+            entry_quality = 0
         
         # Sharpe Ratio
-        returns = [t.pnl for t in trades]
-        if len(returns) > 1:
-            sharpe = np.mean(returns) / np.std(returns) if np.std(returns) > 0 else 0
+        if total > 1:
+            mean, var = _welford(pnls) if NUMBA_ENABLED else _mean_var_numpy(pnls)
+            sharpe = float(mean / math.sqrt(var)) if var > 0 else 0
         else:
             sharpe = 0
         
         # Risk-adjusted return
-        risk_adjusted = (total_pnl / max(abs(sum(t.risk for t in trades)), 1)) * 100
+        risk_adjusted = (total_pnl / max(abs(float(risks.sum())), 1)) * 100
         
         # Criar objeto de performance
         perf = DailyPerformance(
@@ -141,11 +214,54 @@ class SelfEvaluator:
             risk_adjusted_return=risk_adjusted
         )
         
-        self.performance_history.append(perf)
+        self._record_performance(perf)
         self._log_evaluation(perf)
         
         return perf
     
+    @property
+    def current_weights(self) -> Dict[str, float]:
+        """Pesos atuais como dict (cópia)."""
+        return dict(zip(_W_IDX, self._weights_arr.tolist()))
+    
+    @current_weights.setter
+    def current_weights(self, weights):
+        """
+        Aceita dict ou objeto com atributos (ex.: ScoreWeights).
+        Componentes ausentes mantêm o valor atual.
+        """
+        if isinstance(weights, dict):
+            get = weights.get
+        else:
+            get = lambda name, default: getattr(weights, name, default)
+        self._weights_arr = np.array([
+            float(get(name, self._weights_arr[i])) for name, i in _W_IDX.items()
+        ])
+    
+    def _record_performance(self, perf: DailyPerformance):
+        """Adiciona ao histórico e atualiza as janelas em O(1)."""
+        in_sync = self._windows_len == len(self.performance_history)
+        self.performance_history.append(perf)
+        if in_sync:
+            for window in self._windows.values():
+                for name, values in window.items():
+                    values.append(getattr(perf, name))
+            self._windows_len += 1
+    
+    def _window(self, n: int) -> Dict[str, deque]:
+        """
+        Valores dos últimos n dias por campo. Ressincroniza se o histórico
+        foi alterado fora de _record_performance.
+        """
+        if self._windows_len != len(self.performance_history):
+            tail = self.performance_history[-max(_WINDOWS):]
+            for window in self._windows.values():
+                for name, values in window.items():
+                    values.clear()
+                    values.extend(getattr(p, name) for p in tail)
+            self._windows_len = len(self.performance_history)
+        return self._windows[n]
+    
     def adjust_weights_based_on_performance(self) -> Dict:
         """
         Ajusta pesos do score baseado na performance histórica.
@@ -153,52 +269,51 @@ class SelfEvaluator:
         if len(self.performance_history) < 5:
             return None  # Precisa de mais dados
         
-        recent_perf = self.performance_history[-5:]
+        recent_perf = self._window(5)
         
-        adjustments = {}
+        base = self._weights_arr
+        weights = base.copy()
+        adjusted = False
         
         # Se win rate baixo, aumentar peso em confirmações
-        avg_winrate = np.mean([p.win_rate for p in recent_perf])
+        avg_winrate = _mean(recent_perf["win_rate"])
         if avg_winrate < self.min_acceptable_winrate:
-            adjustments["confirmations"] = self.current_weights["confirmations"] * 1.15
-            adjustments["trend"] = self.current_weights["trend"] * 0.90
+            weights[_W_IDX["confirmations"]] = base[_W_IDX["confirmations"]] * 1.15
+            weights[_W_IDX["trend"]] = base[_W_IDX["trend"]] * 0.90
+            adjusted = True
             self.logger.log_system_event(
                 "WEIGHT_ADJUSTMENT",
                 f"Win rate baixo ({avg_winrate:.1%}). Aumentando peso em confirmações."
             )
         
         # Se expectancy baixa, aumentar peso em risk_quality
-        avg_ev = np.mean([p.expectancy for p in recent_perf])
+        avg_ev = _mean(recent_perf["expectancy"])
         if avg_ev < self.min_acceptable_ev:
-            adjustments["risk_quality"] = self.current_weights["risk_quality"] * 1.20
-            adjustments["momentum"] = self.current_weights["momentum"] * 0.85
+            weights[_W_IDX["risk_quality"]] = base[_W_IDX["risk_quality"]] * 1.20
+            weights[_W_IDX["momentum"]] = base[_W_IDX["momentum"]] * 0.85
+            adjusted = True
             self.logger.log_system_event(
                 "WEIGHT_ADJUSTMENT",
                 f"EV baixo ({avg_ev:.2f}). Aumentando peso em qualidade de risco."
             )
         
         # Se drawdown muito alto, aumentar peso em contexto
-        avg_dd = np.mean([p.max_drawdown for p in recent_perf])
+        avg_dd = _mean(recent_perf["max_drawdown"])
         if avg_dd > self.max_acceptable_drawdown:
-            adjustments["context"] = self.current_weights["context"] * 1.25
-            adjustments["momentum"] = self.current_weights["momentum"] * 0.80
+            weights[_W_IDX["context"]] = base[_W_IDX["context"]] * 1.25
+            weights[_W_IDX["momentum"]] = base[_W_IDX["momentum"]] * 0.80
+            adjusted = True
             self.logger.log_system_event(
                 "WEIGHT_ADJUSTMENT",
                 f"Drawdown muito alto ({avg_dd:.1%}). Aumentando peso em contexto."
             )
         
         # Normalizar e aplicar
-        if adjustments:
-            # Adicionar pesos não ajustados
-            for key in self.current_weights:
-                if key not in adjustments:
-                    adjustments[key] = self.current_weights[key]
-            
-            # Normalizar
-            total_weight = sum(adjustments.values())
-            adjustments = {k: v/total_weight for k, v in adjustments.items()}
+        if adjusted:
+            weights /= weights.sum()
+            self._weights_arr = weights
             
-            self.current_weights = adjustments
+            adjustments = self.current_weights
             self.adjustment_history.append({
                 "timestamp": datetime.now().isoformat(),
                 "weights": adjustments.copy(),
@@ -216,11 +331,11 @@ class SelfEvaluator:
         if len(self.performance_history) < 3:
             return self.current_frequency_factor
         
-        recent_perf = self.performance_history[-3:]
+        recent_perf = self._window(3)
         
         # Se performance excelente, aumentar frequência
-        avg_winrate = np.mean([p.win_rate for p in recent_perf])
-        avg_ev = np.mean([p.expectancy for p in recent_perf])
+        avg_winrate = _mean(recent_perf["win_rate"])
+        avg_ev = _mean(recent_perf["expectancy"])
         
         if avg_winrate > 0.60 and avg_ev > 0.5:
             new_factor = min(1.5, self.current_frequency_factor * 1.10)
@@ -280,12 +395,13 @@ class SelfEvaluator:
             return None
         
         recent = self.performance_history[-7:]  # Última semana
+        window = self._window(7)
         
         return {
             "period": "Last 7 days",
-            "avg_winrate": np.mean([p.win_rate for p in recent]),
-            "avg_expectancy": np.mean([p.expectancy for p in recent]),
-            "avg_drawdown": np.mean([p.max_drawdown for p in recent]),
+            "avg_winrate": _mean(window["win_rate"]),
+            "avg_expectancy": _mean(window["expectancy"]),
+            "avg_drawdown": _mean(window["max_drawdown"]),
             "total_trades": sum(p.total_trades for p in recent),
             "current_weights": self.current_weights,
             "frequency_factor": self.current_frequency_factor,
@@ -299,7 +415,7 @@ class SelfEvaluator:
             return "INSUFFICIENT_DATA"
         
         recent_wr = perfs[-1].win_rate
-        previous_wr = np.mean([p.win_rate for p in perfs[:-1]])
+        previous_wr = _mean([p.win_rate for p in perfs[:-1]])
         
         if recent_wr > previous_wr * 1.10:
             return "IMPROVING"
@@ -331,21 +447,33 @@ class SelfEvaluator:
         """Carrega estado persistente"""
         if os.path.exists(self.state_file):
             try:
-                with open(self.state_file, 'r') as f:
-                    data = json.load(f)
-                    self.current_weights = data.get("weights", self.current_weights)
-                    self.current_frequency_factor = data.get("frequency_factor", 1.0)
-                    self.current_aggressiveness = data.get("aggressiveness", 1.0)
+                if ORJSON_ENABLED:
+                    with open(self.state_file, 'rb') as f:
+                        data = orjson.loads(f.read())
+                else:
+                    with open(self.state_file, 'r') as f:
+                        data = json.load(f)
+                self.current_weights = data.get("weights", self.current_weights)
+                self.current_frequency_factor = data.get("frequency_factor", 1.0)
+                self.current_aggressiveness = data.get("aggressiveness", 1.0)
             except:
                 pass
     
     def save_state(self):
-        """Salva estado persistente"""
+        """Salva estado persistente (escrita atômica: .tmp + os.replace)"""
         os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
-        with open(self.state_file, 'w') as f:
-            json.dump({
-                "weights": self.current_weights,
-                "frequency_factor": self.current_frequency_factor,
-                "aggressiveness": self.current_aggressiveness,
-                "timestamp": datetime.now().isoformat()
-            }, f, indent=2)
+        state = {
+            "weights": self.current_weights,
+            "frequency_factor": self.current_frequency_factor,
+            "aggressiveness": self.current_aggressiveness,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        tmp_file = self.state_file + ".tmp"
+        if ORJSON_ENABLED:
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(state, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(tmp_file, 'w') as f:
+                json.dump(state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
@@ -5,14 +5,200 @@ CAMADA 12: APRENDIZADO POR SIMILARIDADE
 O bot encontra situações históricas parecidas e usa como referência.
 """
 
+import math
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import numpy as np
 from datetime import datetime, timedelta
 from core.logger import get_logger
+from core.trade_history_buffer import (
+    TradeHistoryBuffer, INVALID, VOL_NUM, lookup_code, numeric, pattern_family, trade_version
+)
+from core._numba_compat import njit, prange, NUMBA_ENABLED
 
 
-@dataclass
+# Componentes de similaridade na ordem dos pesos padrão
+_SIMILARITY_KEYS = (
+    "trend_direction", "volatility_level", "market_structure",
+    "pattern_type", "session", "momentum", "liquidity"
+)
+
+
+def _confidences(days_ago: np.ndarray, pnl: np.ndarray, risk: np.ndarray) -> np.ndarray:
+    """
+    Versão vetorial de SimilarityMatcher._calculate_confidence.
+    """
+    recency = 1.0 - days_ago / 90
+    with_risk = risk > 0
+    r_multiple = np.divide(pnl, risk, out=np.zeros_like(pnl), where=with_risk)
+    bonus = np.where(r_multiple > 2, 0.20, np.where(r_multiple > 1, 0.10, 0.0))
+    return np.minimum(1.0, 0.5 + recency * 0.30 + bonus)
+
+
+@lru_cache(maxsize=4096)
+def _parse_entry_time(entry_time: str) -> datetime:
+    """entry_time ISO -> datetime (cada trade é parseado uma vez)."""
+    return datetime.fromisoformat(entry_time)
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _similarity_kernel(
+    cur_trend, cur_vol, cur_vol_num, cur_struct, cur_pattern,
+    cur_session, cur_mom, cur_liq, weights, prune_below, rest_max,
+    valid, trend, vol, vol_num, struct, pattern, session, momentum, liquidity
+):
+    """
+    Mesmo score ponderado de _calculate_similarity para todo o histórico.
+    Trades cujo máximo atingível após os 4 componentes de maior peso
+    (parcial + rest_max) fica abaixo de prune_below recebem esse limite
+    superior em vez do score exato.
+    """
+    n = valid.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    
+    for i in prange(n):
+        if not valid[i]:
+            acc = 0.0
+            for k in range(7):
+                acc += 0.5 * weights[k]
+            out[i] = acc
+            continue
+        
+        # 1. Tendência
+        if cur_trend == -1:
+            s_trend = 0.5
+        elif cur_trend == trend[i]:
+            s_trend = 1.0
+        else:
+            s_trend = 0.3
+        
+        # 2. Volatilidade
+        if cur_vol == -1:
+            s_vol = 0.5
+        elif cur_vol == vol[i]:
+            s_vol = 1.0
+        elif abs(cur_vol_num - vol_num[i]) <= 1:
+            s_vol = 0.7
+        else:
+            s_vol = 0.3
+        
+        # 3. Estrutura
+        if np.isnan(cur_struct) or np.isnan(struct[i]):
+            s_struct = 0.5
+        else:
+            s_struct = 1.0 - abs(cur_struct - struct[i]) / 100
+            if not s_struct > 0:
+                s_struct = 0.0
+        
+        # 4. Padrão
+        if cur_pattern == -1 or pattern[i] == -1:
+            s_pattern = 0.5
+        elif cur_pattern == pattern[i]:
+            s_pattern = 0.9
+        else:
+            s_pattern = 0.4
+        
+        partial = (
+            0.0
+            + s_trend * weights[0]
+            + s_vol * weights[1]
+            + s_struct * weights[2]
+            + s_pattern * weights[3]
+        )
+        if partial + rest_max < prune_below:
+            out[i] = partial + rest_max
+            continue
+        
+        # 5. Sessão
+        if cur_session == -1:
+            s_session = 0.5
+        elif cur_session == session[i]:
+            s_session = 1.0
+        else:
+            s_session = 0.5
+        
+        # 6. Momentum
+        if np.isnan(cur_mom) or np.isnan(momentum[i]):
+            s_mom = 0.5
+        else:
+            s_mom = 1.0 - abs(cur_mom - momentum[i])
+            if not s_mom > 0:
+                s_mom = 0.0
+        
+        # 7. Liquidez
+        if np.isnan(cur_liq) or np.isnan(liquidity[i]):
+            s_liq = 0.5
+        else:
+            s_liq = 1.0 - abs(cur_liq - liquidity[i])
+            if not s_liq > 0:
+                s_liq = 0.0
+        
+        out[i] = (
+            partial
+            + s_session * weights[4]
+            + s_mom * weights[5]
+            + s_liq * weights[6]
+        )
+    
+    return out
+
+
+def _similarity_numpy(
+    cur_trend, cur_vol, cur_vol_num, cur_struct, cur_pattern,
+    cur_session, cur_mom, cur_liq, weights, prune_below, rest_max,
+    valid, trend, vol, vol_num, struct, pattern, session, momentum, liquidity
+):
+    """Fallback vetorizado (sem Numba) de _similarity_kernel (sem poda)."""
+    def clipped(sim, a, b):
+        return np.where(np.isnan(a) | np.isnan(b), 0.5, np.where(sim > 0, sim, 0.0))
+    
+    if cur_trend == -1:
+        s_trend = np.full(len(valid), 0.5)
+    else:
+        s_trend = np.where(trend == cur_trend, 1.0, 0.3)
+    
+    if cur_vol == -1:
+        s_vol = np.full(len(valid), 0.5)
+    else:
+        s_vol = np.where(
+            vol == cur_vol, 1.0,
+            np.where(np.abs(vol_num - cur_vol_num) <= 1, 0.7, 0.3)
+        )
+    
+    s_struct = clipped(1.0 - np.abs(cur_struct - struct) / 100, cur_struct, struct)
+    
+    if cur_pattern == -1:
+        s_pattern = np.full(len(valid), 0.5)
+    else:
+        s_pattern = np.where(pattern == -1, 0.5, np.where(pattern == cur_pattern, 0.9, 0.4))
+    
+    if cur_session == -1:
+        s_session = np.full(len(valid), 0.5)
+    else:
+        s_session = np.where(session == cur_session, 1.0, 0.5)
+    
+    s_mom = clipped(1.0 - np.abs(cur_mom - momentum), cur_mom, momentum)
+    s_liq = clipped(1.0 - np.abs(cur_liq - liquidity), cur_liq, liquidity)
+    
+    out = (
+        0.0
+        + s_trend * weights[0]
+        + s_vol * weights[1]
+        + s_struct * weights[2]
+        + s_pattern * weights[3]
+        + s_session * weights[4]
+        + s_mom * weights[5]
+        + s_liq * weights[6]
+    )
+    neutral = 0.0
+    for w in weights:
+        neutral += 0.5 * w
+    return np.where(valid, out, neutral)
+
+
+@dataclass(slots=True, frozen=True)
 class SimilarityMatch:
     """Representação de um match histórico similar"""
     historical_trade_id: str
@@ -48,6 +234,18 @@ class SimilarityMatcher:
         # Thresholds
         self.min_similarity_score = 0.75
         self.historical_lookback_days = 90
+        
+        # Histórico codificado em arrays paralelos (incremental)
+        self._history = TradeHistoryBuffer()
+        
+        # Pesos como vetor na ordem de _SIMILARITY_KEYS (refeito se mudarem)
+        self._weights_key = None
+        self._weight_vec = None
+        self._weight_extra = 0.0
+        
+        # Memo LRU: situação atual codificada + pesos -> scores do histórico
+        self._memo: OrderedDict = OrderedDict()
+        self._memo_size = 256
     
     def find_similar_situations(
         self,
@@ -68,32 +266,172 @@ class SimilarityMatcher:
             return []
         
         matches = []
+        now = datetime.now()
+        
+        # Calcular similaridade com todo o histórico de uma vez
+        scores = self._similarity_scores(current_market, current_pattern, trades)
+        selected = np.flatnonzero(scores >= self.min_similarity_score)
+        matched = [trades[i] for i in selected]
         
-        # Calcular similaridade com cada trade histórico
-        for trade in trades:
-            similarity_score = self._calculate_similarity(
-                current_context,
-                current_market,
-                current_pattern,
-                trade
+        # Confiança de todos os matches numa expressão vetorial (pnl/risk
+        # lidos dos trades agora, como outcome e pnl do SimilarityMatch)
+        confidences = _confidences(
+            np.fromiter(
+                ((now - _parse_entry_time(t.entry_time)).days for t in matched),
+                dtype=np.float64, count=len(matched)
+            ),
+            np.fromiter((numeric(t.pnl) for t in matched), dtype=np.float64, count=len(matched)),
+            np.fromiter((numeric(t.risk) for t in matched), dtype=np.float64, count=len(matched))
+        )
+        
+        for i, trade, confidence in zip(selected, matched, confidences.tolist()):
+            match = SimilarityMatch(
+                historical_trade_id=trade.id,
+                similarity_score=float(scores[i]),
+                context=trade.context,
+                outcome="WIN" if trade.pnl > 0 else "LOSE",
+                confidence=confidence,
+                pnl=trade.pnl
             )
-            
-            if similarity_score >= self.min_similarity_score:
-                match = SimilarityMatch(
-                    historical_trade_id=trade.id,
-                    similarity_score=similarity_score,
-                    context=trade.context,
-                    outcome="WIN" if trade.pnl > 0 else "LOSE",
-                    confidence=self._calculate_confidence(trade),
-                    pnl=trade.pnl
-                )
-                matches.append(match)
+            matches.append(match)
         
         # Ordenar por similaridade
         matches.sort(key=lambda x: x.similarity_score, reverse=True)
         
         return matches[:top_n]
     
+    def _similarity_scores(
+        self,
+        current_market: Dict,
+        current_pattern: str,
+        trades: List
+    ) -> np.ndarray:
+        """
+        Scores de _calculate_similarity para todos os trades (kernel vetorial).
+        Abaixo de min_similarity_score o valor pode ser só um limite superior.
+        """
+        arrays = self._ensure_history_arrays(trades)
+        current = self._encode_current(current_market, current_pattern)
+        
+        weights, extra = self._weight_vector()
+        
+        key = (current, self._weights_key, self.min_similarity_score)
+        cached = self._memo.get(key)
+        if cached is not None:
+            self._memo.move_to_end(key)
+            return cached
+        
+        # Poda: sessão/momentum/liquidez valem no máximo 1.0 cada; folga
+        # de 1e-9 cobre diferenças de arredondamento na soma
+        rest_max = float(np.maximum(weights[4:], 0.0).sum())
+        prune_below = self.min_similarity_score - extra - 1e-9
+        
+        kernel = _similarity_kernel if NUMBA_ENABLED else _similarity_numpy
+        scores = kernel(
+            *current,
+            weights, prune_below, rest_max,
+            arrays["valid"], arrays["trend"], arrays["vol"], arrays["vol_num"],
+            arrays["struct"], arrays["pattern"], arrays["session"],
+            arrays["momentum"], arrays["liquidity"]
+        )
+        if extra:
+            scores = scores + extra
+        
+        # Somente leitura: o mesmo array é devolvido em hits do memo
+        scores.flags.writeable = False
+        self._memo[key] = scores
+        if len(self._memo) > self._memo_size:
+            self._memo.popitem(last=False)
+        return scores
+    
+    def _weight_vector(self) -> Tuple[np.ndarray, float]:
+        """
+        Pesos na ordem de _SIMILARITY_KEYS e contribuição neutra (0.5) de
+        chaves extras; recalculados só quando similarity_weights muda.
+        """
+        key = tuple(self.similarity_weights.items())
+        if key != self._weights_key:
+            self._weights_key = key
+            self._weight_vec = np.array(
+                [self.similarity_weights.get(name, 0.0) for name in _SIMILARITY_KEYS],
+                dtype=np.float64
+            )
+            self._weight_extra = sum(
+                0.5 * weight for name, weight in key
+                if name not in _SIMILARITY_KEYS
+            )
+        return self._weight_vec, self._weight_extra
+    
+    def _ensure_history_arrays(self, trades: List) -> Dict[str, np.ndarray]:
+        """
+        Sincroniza o buffer com os trades do histórico pela versão
+        (id, pnl, risk) de cada trade: trades novos no fim são anexados,
+        trades alterados no lugar (mesmo id) são recodificados e qualquer
+        outra mudança reconstrói o buffer. Mudanças invalidam o memo de scores.
+        """
+        history = self._history
+        known = len(history)
+        versions = [trade_version(trade) for trade in trades]
+        
+        if known <= len(versions) and versions[:known] == history.versions:
+            if known == len(versions):
+                return history.arrays()
+        elif known <= len(versions) and [v[0] for v in versions[:known]] == history.trade_ids:
+            for i, (version, cached) in enumerate(zip(versions, history.versions)):
+                if version != cached:
+                    history.replace(i, trades[i])
+        else:
+            history.clear()
+            known = 0
+        
+        history.extend(trades[known:])
+        self._memo.clear()
+        return history.arrays()
+    
+    def _encode_current(self, current_market: Dict, current_pattern: str) -> Tuple:
+        """
+        Situação atual como escalares para o kernel (mesmos defaults).
+        """
+        vocab = self._history.vocab
+        
+        trend = current_market.get("trend", {})
+        consensus = trend.get("consensus", {}) if isinstance(trend, dict) else None
+        cur_trend = (
+            lookup_code(vocab["trend"], consensus.get("direction"))
+            if isinstance(consensus, dict) else INVALID
+        )
+        
+        volatility = current_market.get("volatility", {})
+        if isinstance(volatility, dict):
+            vol_class = volatility.get("classification")
+            cur_vol = lookup_code(vocab["vol"], vol_class)
+            cur_vol_num = self._vol_to_num(vol_class)
+        else:
+            cur_vol, cur_vol_num = INVALID, 1
+        
+        structure = current_market.get("structure", {})
+        cur_struct = numeric(structure.get("strength", 0)) if isinstance(structure, dict) else np.nan
+        
+        family = pattern_family(current_pattern)
+        cur_pattern = lookup_code(vocab["pattern"], family) if family is not None else INVALID
+        
+        session = current_market.get("session", {})
+        cur_session = (
+            lookup_code(vocab["session"], session.get("current"))
+            if isinstance(session, dict) else INVALID
+        )
+        
+        momentum = current_market.get("momentum", {})
+        cur_mom = numeric(momentum.get("score", 50)) / 100 if isinstance(momentum, dict) else np.nan
+        
+        liquidity = current_market.get("liquidity", {})
+        cur_liq = numeric(liquidity.get("score", 50)) / 100 if isinstance(liquidity, dict) else np.nan
+        
+        return (
+            cur_trend, cur_vol, cur_vol_num, cur_struct, cur_pattern,
+            cur_session, cur_mom, cur_liq
+        )
+    
     def _calculate_similarity(
         self,
         current_context: Dict,
@@ -104,102 +442,86 @@ class SimilarityMatcher:
         """
         Calcula score de similaridade entre situação atual e histórica.
         """
-        scores = {}
-        
-        # 1. Similaridade de direção de tendência
-        try:
-            current_trend = current_market.get("trend", {}).get("consensus", {}).get("direction")
-            historical_trend = historical_trade.context.get("trend_direction")
-            
-            trend_sim = 1.0 if current_trend == historical_trend else 0.3
-            scores["trend_direction"] = trend_sim
-        except:
-            scores["trend_direction"] = 0.5
+        # Posições na ordem de _SIMILARITY_KEYS; campos ausentes ou com tipo
+        # inválido ficam com similaridade neutra 0.5
+        scores = [0.5] * len(_SIMILARITY_KEYS)
         
-        # 2. Similaridade de volatilidade
-        try:
-            current_vol = current_market.get("volatility", {}).get("classification")
-            historical_vol = historical_trade.context.get("volatility_level")
+        context = getattr(historical_trade, "context", None)
+        if isinstance(context, dict):
+            # 1. Similaridade de direção de tendência
+            trend = current_market.get("trend", {})
+            consensus = trend.get("consensus", {}) if isinstance(trend, dict) else None
+            if isinstance(consensus, dict):
+                current_trend = consensus.get("direction")
+                scores[0] = 1.0 if current_trend == context.get("trend_direction") else 0.3
             
-            vol_sim = 1.0 if current_vol == historical_vol else (
-                0.7 if abs(self._vol_to_num(current_vol) - self._vol_to_num(historical_vol)) <= 1 else 0.3
-            )
-            scores["volatility_level"] = vol_sim
-        except:
-            scores["volatility_level"] = 0.5
-        
-        # 3. Similaridade de estrutura (HH/HL/LH/LL)
-        try:
-            current_struct = current_market.get("structure", {}).get("strength", 0)
-            historical_struct = historical_trade.context.get("market_structure", 0)
+            # 2. Similaridade de volatilidade
+            volatility = current_market.get("volatility", {})
+            if isinstance(volatility, dict):
+                current_vol = volatility.get("classification")
+                historical_vol = context.get("volatility_level")
+                scores[1] = 1.0 if current_vol == historical_vol else (
+                    0.7 if abs(self._vol_to_num(current_vol) - self._vol_to_num(historical_vol)) <= 1 else 0.3
+                )
             
-            struct_sim = 1.0 - abs(current_struct - historical_struct) / 100
-            scores["market_structure"] = max(0, struct_sim)
-        except:
-            scores["market_structure"] = 0.5
-        
-        # 4. Similaridade de padrão
-        try:
-            current_pattern_type = current_pattern.split("_")[0] if "_" in current_pattern else current_pattern
-            historical_pattern = historical_trade.context.get("pattern_type", "").split("_")[0]
+            # 3. Similaridade de estrutura (HH/HL/LH/LL)
+            structure = current_market.get("structure", {})
+            if isinstance(structure, dict):
+                current_struct = numeric(structure.get("strength", 0))
+                historical_struct = numeric(context.get("market_structure", 0))
+                if not (math.isnan(current_struct) or math.isnan(historical_struct)):
+                    scores[2] = max(0, 1.0 - abs(current_struct - historical_struct) / 100)
             
-            pattern_sim = 0.9 if current_pattern_type.lower() == historical_pattern.lower() else 0.4
-            scores["pattern_type"] = pattern_sim
-        except:
-            scores["pattern_type"] = 0.5
-        
-        # 5. Similaridade de sessão
-        try:
-            current_session = current_market.get("session", {}).get("current")
-            historical_session = historical_trade.context.get("session")
+            # 4. Similaridade de padrão
+            current_family = pattern_family(current_pattern)
+            historical_family = pattern_family(context.get("pattern_type", ""))
+            if current_family is not None and historical_family is not None:
+                scores[3] = 0.9 if current_family == historical_family else 0.4
             
-            session_sim = 1.0 if current_session == historical_session else 0.5
-            scores["session"] = session_sim
-        except:
-            scores["session"] = 0.5
-        
-        # 6. Similaridade de momentum
-        try:
-            current_mom = current_market.get("momentum", {}).get("score", 50) / 100
-            historical_mom = historical_trade.context.get("momentum", 0.5)
+            # 5. Similaridade de sessão
+            session = current_market.get("session", {})
+            if isinstance(session, dict):
+                scores[4] = 1.0 if session.get("current") == context.get("session") else 0.5
             
-            mom_sim = 1.0 - abs(current_mom - historical_mom)
-            scores["momentum"] = max(0, mom_sim)
-        except:
-            scores["momentum"] = 0.5
-        
-        # 7. Similaridade de liquidez
-        try:
-            current_liq = current_market.get("liquidity", {}).get("score", 50) / 100
-            historical_liq = historical_trade.context.get("liquidity", 0.5)
+            # 6. Similaridade de momentum
+            momentum = current_market.get("momentum", {})
+            if isinstance(momentum, dict):
+                current_mom = numeric(momentum.get("score", 50)) / 100
+                historical_mom = numeric(context.get("momentum", 0.5))
+                if not (math.isnan(current_mom) or math.isnan(historical_mom)):
+                    scores[5] = max(0, 1.0 - abs(current_mom - historical_mom))
             
-            liq_sim = 1.0 - abs(current_liq - historical_liq)
-            scores["liquidity"] = max(0, liq_sim)
-        except:
-            scores["liquidity"] = 0.5
+            # 7. Similaridade de liquidez
+            liquidity = current_market.get("liquidity", {})
+            if isinstance(liquidity, dict):
+                current_liq = numeric(liquidity.get("score", 50)) / 100
+                historical_liq = numeric(context.get("liquidity", 0.5))
+                if not (math.isnan(current_liq) or math.isnan(historical_liq)):
+                    scores[6] = max(0, 1.0 - abs(current_liq - historical_liq))
         
         # Calcular score ponderado
-        weighted_score = sum(
-            scores.get(key, 0.5) * weight
-            for key, weight in self.similarity_weights.items()
-        )
+        weights, extra = self._weight_vector()
+        weighted_score = 0.0
+        for score, weight in zip(scores, weights.tolist()):
+            weighted_score += score * weight
         
-        return weighted_score
+        return weighted_score + extra if extra else weighted_score
     
     def _vol_to_num(self, vol_class: str) -> int:
         """Converte classe de volatilidade para número"""
-        mapping = {"LOW": 0, "NORMAL": 1, "HIGH": 2}
-        return mapping.get(vol_class, 1)
+        return VOL_NUM.get(vol_class, 1)
     
-    def _calculate_confidence(self, trade: Dict) -> float:
+    def _calculate_confidence(self, trade: Dict, now: Optional[datetime] = None) -> float:
         """
         Calcula confiança no match histórico.
         Baseado em: recência, sequência de wins, R-múltiplos
         """
         confidence = 0.5
+        if now is None:
+            now = datetime.now()
         
         # Trades recentes têm mais confiança
-        days_ago = (datetime.now() - datetime.fromisoformat(trade.entry_time)).days
+        days_ago = (now - _parse_entry_time(trade.entry_time)).days
         recency_factor = 1.0 - (days_ago / 90)  # Vai de 1 (hoje) para 0 (90 dias)
         confidence += recency_factor * 0.30
         
@@ -0,0 +1,171 @@
+"""
+═══════════════════════════════════════════════════════════════════
+BUFFER DE HISTÓRICO - CONTEXTO DOS TRADES EM ARRAYS PARALELOS
+═══════════════════════════════════════════════════════════════════
+Mantém o contexto dos trades históricos já codificado (SoA) para a
+busca por similaridade: a conversão de categorias em códigos inteiros
+acontece na inserção, não na busca.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+# Classe de volatilidade -> código ordinal (desconhecida = NORMAL)
+VOL_NUM = {"LOW": 0, "NORMAL": 1, "HIGH": 2}
+
+# Códigos especiais: -1 = campo inválido (similaridade neutra 0.5),
+# -2 = valor histórico sem código, -3 = valor atual ausente do histórico
+INVALID = -1
+UNCODED = -2
+UNSEEN = -3
+
+# Campo -> (dtype, valor inicial)
+_FIELDS = {
+    "valid": (np.bool_, False),
+    "trend": (np.int64, INVALID),
+    "vol": (np.int64, INVALID),
+    "vol_num": (np.int64, 1),
+    "struct": (np.float64, np.nan),
+    "pattern": (np.int64, INVALID),
+    "session": (np.int64, INVALID),
+    "momentum": (np.float64, np.nan),
+    "liquidity": (np.float64, np.nan),
+    "pnl": (np.float64, np.nan),
+    "risk": (np.float64, np.nan),
+}
+
+
+def vocab_code(vocab: Dict, value) -> int:
+    """Código inteiro estável para um valor categórico do histórico."""
+    try:
+        return vocab.setdefault(value, len(vocab))
+    except TypeError:
+        return UNCODED
+
+
+def lookup_code(vocab: Dict, value) -> int:
+    """Código de um valor atual (sem inserir no vocabulário)."""
+    try:
+        return vocab.get(value, UNSEEN)
+    except TypeError:
+        return UNSEEN
+
+
+def numeric(value) -> float:
+    """Valor numérico do contexto; NaN quando não numérico."""
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    return np.nan
+
+
+def trade_version(trade) -> Tuple:
+    """Identidade + campos mutáveis do trade usados pelo buffer."""
+    return (trade.id, trade.pnl, trade.risk)
+
+
+def pattern_family(pattern) -> Optional[str]:
+    """Família do padrão (prefixo antes de '_'), em minúsculas."""
+    if not isinstance(pattern, str):
+        return None
+    return pattern.split("_")[0].lower()
+
+
+class TradeHistoryBuffer:
+    """
+    Arrays paralelos com o contexto codificado de cada trade.
+
+    append() é O(1) amortizado (capacidade dobra quando enche).
+    versions guarda (id, pnl, risk) de cada trade na codificação, para
+    detectar trades alterados depois de inseridos (ex: posição fechada).
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.vocab: Dict[str, Dict] = {key: {} for key in ("trend", "vol", "pattern", "session")}
+        self.trade_ids: List = []
+        self.versions: List[Tuple] = []
+        self._size = 0
+        self._data = {
+            name: np.full(capacity, fill, dtype=dtype)
+            for name, (dtype, fill) in _FIELDS.items()
+        }
+        self._views: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        """Esvazia o buffer (vocabulário e capacidade são mantidos)."""
+        for name, (_, fill) in _FIELDS.items():
+            self._data[name][:self._size] = fill
+        self._size = 0
+        self.trade_ids = []
+        self.versions = []
+        self._views = None
+
+    def extend(self, trades: List):
+        """Adiciona vários trades em ordem."""
+        for trade in trades:
+            self.append(trade)
+
+    def append(self, trade):
+        """
+        Codifica e adiciona um trade (precisa de .id, .context, .pnl, .risk).
+        """
+        if self._size == len(self._data["valid"]):
+            self._grow()
+
+        i = self._size
+        self._size += 1
+        self.trade_ids.append(trade.id)
+        self.versions.append(trade_version(trade))
+        self._views = None
+        self._encode(i, trade)
+
+    def replace(self, i: int, trade):
+        """Recodifica o slot `i` com o estado atual do trade (mesmo id)."""
+        data = self._data
+        for name, (_, fill) in _FIELDS.items():
+            data[name][i] = fill
+        self.trade_ids[i] = trade.id
+        self.versions[i] = trade_version(trade)
+        self._encode(i, trade)
+
+    def _encode(self, i: int, trade):
+        """Grava o contexto codificado do trade no slot `i`."""
+        data = self._data
+        data["pnl"][i] = numeric(trade.pnl)
+        data["risk"][i] = numeric(trade.risk)
+
+        context = trade.context
+        if not isinstance(context, dict):
+            return
+
+        vocab = self.vocab
+        vol_class = context.get("volatility_level")
+        family = pattern_family(context.get("pattern_type", ""))
+
+        data["valid"][i] = True
+        data["trend"][i] = vocab_code(vocab["trend"], context.get("trend_direction"))
+        data["vol"][i] = vocab_code(vocab["vol"], vol_class)
+        data["vol_num"][i] = VOL_NUM.get(vol_class, 1)
+        data["struct"][i] = numeric(context.get("market_structure", 0))
+        if family is not None:
+            data["pattern"][i] = vocab_code(vocab["pattern"], family)
+        data["session"][i] = vocab_code(vocab["session"], context.get("session"))
+        data["momentum"][i] = numeric(context.get("momentum", 0.5))
+        data["liquidity"][i] = numeric(context.get("liquidity", 0.5))
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Views dos arrays preenchidos (válidas até o próximo append/clear)."""
+        if self._views is None:
+            self._views = {name: array[:self._size] for name, array in self._data.items()}
+        return self._views
+
+    def _grow(self):
+        """Dobra a capacidade de todos os arrays."""
+        capacity = 2 * len(self._data["valid"])
+        for name, (dtype, fill) in _FIELDS.items():
+            grown = np.full(capacity, fill, dtype=dtype)
+            grown[:self._size] = self._data[name][:self._size]
+            self._data[name] = grown
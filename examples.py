@@ -178,7 +178,7 @@ def example_risk_management():
     # Verificar se pode operar
     can_trade, reason = risk.can_trade()
     print(f"\nPode operar? {can_trade}")
-    print(f"Razão: {reason}")
+    print(f"Razão: {risk.describe_reason(reason)}")
     
     # Calcular tamanho de posição
     position_size = risk.calculate_position_size(
@@ -0,0 +1,46 @@
+"""
+Testes dos caches incrementais do PatternEngine (EMA-50 / média de volume).
+Executar com: python -m pytest -q test_pattern_engine.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.pattern_engine import PatternEngine
+
+
+def _frame(rng, n=300):
+    # Preços arredondados e último fechamento fixo: frames novos com mesmo
+    # len e mesmo último valor (o caso em que ids reutilizados confundiam o cache)
+    close = np.round(100 + np.cumsum(rng.normal(0, 1, n)), 0)
+    close[-1] = 100.0
+    return pd.DataFrame({
+        "open": close,
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+        "volume": np.round(rng.random(n) * 10, 0),
+    })
+
+
+def test_ema_matches_pandas_on_fresh_frames():
+    rng = np.random.default_rng(0)
+    engine = PatternEngine()
+    for _ in range(200):
+        df = _frame(rng)
+        expected = df["close"].ewm(span=50).mean().iloc[-1]
+        assert np.isclose(engine._ema(df, span=50), expected, rtol=1e-9)
+        assert np.isclose(engine._volume_mean(df), df["volume"].iloc[-20:].mean(), rtol=1e-12)
+        del df
+
+
+def test_ema_incremental_growth_matches_pandas():
+    rng = np.random.default_rng(1)
+    engine = PatternEngine()
+    df = _frame(rng, n=100)
+    engine._ema(df, span=50)
+    for _ in range(20):
+        close = df["close"].iloc[-1] + rng.normal()
+        df.loc[len(df)] = [close, close + 1, close - 1, close, 1.0]
+        expected = df["close"].ewm(span=50).mean().iloc[-1]
+        assert np.isclose(engine._ema(df, span=50), expected, rtol=1e-9)
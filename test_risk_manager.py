@@ -0,0 +1,221 @@
+"""
+Testes do RiskManager: persistência do resumo + journal e reinício a frio.
+Executar com: python -m pytest -q test_risk_manager.py
+"""
+
+import json
+
+from core.risk_manager import RiskLimits, RiskManager, RejectReason
+
+
+def _limits() -> RiskLimits:
+    """Limites folgados: só o drawdown pode bloquear."""
+    return RiskLimits(
+        max_daily_loss=1e9,
+        max_weekly_loss=1e9,
+        max_monthly_loss=1e9,
+        daily_profit_target=1e9,
+        weekly_profit_target=1e9,
+        max_trades_per_day=10**6,
+        max_consecutive_losses=10**6,
+        pause_after_losses=False,
+    )
+
+
+def _manager(tmp_path) -> RiskManager:
+    return RiskManager(limits=_limits(), state_file=str(tmp_path / "risk_state.json"))
+
+
+def test_restart_round_trip(tmp_path):
+    """Resumo, histórico e bloqueio sobrevivem a um reinício."""
+    rm = _manager(tmp_path)
+    for pnl in (120.0, -40.0, 35.5, -80.0, 10.0):
+        rm.record_trade(pnl, pnl > 0, {"symbol": "BTCUSDT"})
+    rm.flush()
+
+    restarted = _manager(tmp_path)
+    assert restarted.state.to_dict() == rm.state.to_dict()
+    assert list(restarted.state.trade_history) == list(rm.state.trade_history)
+    assert restarted.can_trade() == rm.can_trade()
+    assert restarted.get_risk_metrics() == rm.get_risk_metrics()
+
+
+def test_restart_keeps_drawdown_block(tmp_path):
+    """O journal truncado (1000 linhas) não pode reduzir o drawdown persistido."""
+    rm = _manager(tmp_path)
+    for _ in range(60):
+        rm.record_trade(-40.0, False)
+    for _ in range(1000):
+        rm.record_trade(0.5, True)
+    rm.flush()
+
+    before = rm.state.current_drawdown_pct
+    assert before > rm.limits.max_drawdown_pct
+    assert rm.can_trade()[1] is RejectReason.MAX_DRAWDOWN
+
+    restarted = _manager(tmp_path)
+    assert restarted.state.current_drawdown_pct == before
+    assert restarted.state.max_drawdown_pct >= before
+    assert restarted.can_trade()[1] is RejectReason.MAX_DRAWDOWN
+
+
+def test_restart_after_monthly_reset_keeps_live_drawdown(tmp_path):
+    """O journal cruza um reset mensal: o reinício não eleva o drawdown atual."""
+    rm = _manager(tmp_path)
+    for _ in range(10):
+        rm.record_trade(-100.0, False)
+    rm.state.monthly_pnl = 0.0  # reset mensal (dia 1)
+    for _ in range(6):
+        rm.record_trade(-100.0, False)
+    rm.flush()
+
+    assert rm.state.current_drawdown_pct == 6.0
+    assert rm.can_trade() == (True, RejectReason.ALLOWED)
+
+    restarted = _manager(tmp_path)
+    assert restarted.state.current_drawdown_pct == rm.state.current_drawdown_pct
+    assert restarted.state.max_drawdown_pct == rm.state.max_drawdown_pct
+    assert restarted.can_trade() == (True, RejectReason.ALLOWED)
+
+
+def test_restarts_do_not_inflate_max_drawdown(tmp_path):
+    """Reinícios repetidos mantêm o drawdown máximo medido ao vivo."""
+    rm = _manager(tmp_path)
+    rm.record_trade(-1000.0, False)
+    rm.state.monthly_pnl = 0.0  # reset mensal (dia 1)
+    rm.record_trade(-500.0, False)
+    rm.flush()
+    assert rm.state.max_drawdown_pct == 10.0
+
+    for _ in range(3):
+        rm = _manager(tmp_path)
+        assert rm.state.max_drawdown_pct == 10.0
+        assert rm.state.current_drawdown_pct == 5.0
+
+
+def test_journal_per_state_file(tmp_path):
+    """Gestores no mesmo diretório não compartilham o journal."""
+    a = RiskManager(limits=_limits(), state_file=str(tmp_path / "a.json"))
+    b = RiskManager(limits=_limits(), state_file=str(tmp_path / "b.json"))
+    assert a.journal_file == str(tmp_path / "a.journal.ndjson")
+    assert a.journal_file != b.journal_file
+
+    a.record_trade(-10.0, False)
+    assert len(RiskManager(limits=_limits(), state_file=str(tmp_path / "b.json")).state.trade_history) == 0
+
+
+def test_loss_saved_without_flush(tmp_path):
+    """Loss grava o resumo na hora: uma queda sem flush não perde o contador."""
+    rm = _manager(tmp_path)
+    rm.record_trade(5.0, True)
+    rm.record_trade(-20.0, False)
+
+    restarted = _manager(tmp_path)
+    assert restarted.state.total_losses == 1
+    assert restarted.state.consecutive_losses == 1
+    assert restarted.state.daily_pnl == rm.state.daily_pnl
+
+
+def test_journal_compaction(tmp_path):
+    """O journal é compactado e o reinício relê apenas o histórico mantido."""
+    rm = _manager(tmp_path)
+    limit = rm.JOURNAL_TAIL_LINES
+    total = rm.JOURNAL_COMPACT_FACTOR * limit + 5
+    for i in range(total):
+        rm.record_trade(1.0, True, {"i": i})
+    rm.flush()
+
+    with open(rm.journal_file, "rb") as f:
+        assert sum(1 for _ in f) <= rm.JOURNAL_COMPACT_FACTOR * limit
+
+    restarted = _manager(tmp_path)
+    history = list(restarted.state.trade_history)
+    assert len(history) == limit
+    assert [t["details"]["i"] for t in history] == list(range(total - limit, total))
+
+
+def test_startup_reads_tail_and_compacts(tmp_path, monkeypatch):
+    """Journal antigo não compactado: lê só o fim (em blocos) e compacta."""
+    monkeypatch.setattr(RiskManager, "JOURNAL_READ_BLOCK", 256)
+    rm = _manager(tmp_path)
+    limit = rm.JOURNAL_TAIL_LINES
+    total = 3 * limit
+    with open(rm.journal_file, "wb") as f:
+        f.write(b"".join(rm._journal_line({"pnl": 0.0, "was_win": True, "details": {"i": i}})
+                         for i in range(total)))
+        f.write(b'{"pnl": 1.0, "was_')  # escrita interrompida
+
+    restarted = _manager(tmp_path)
+    history = list(restarted.state.trade_history)
+    # A linha cortada ocupa uma das `limit` posições e é descartada
+    assert [t["details"]["i"] for t in history] == list(range(total - limit + 1, total))
+    with open(rm.journal_file, "rb") as f:
+        assert sum(1 for _ in f) == limit - 1
+
+
+def test_reject_reason_str_has_no_placeholders(tmp_path):
+    """str(reason) é um rótulo pronto; valores só via describe_reason."""
+    rm = _manager(tmp_path)
+    rm.state.trades_today = 7
+    for reason in RejectReason:
+        assert "{" not in str(reason)
+        assert "{" not in rm.describe_reason(reason, expected_risk=10.0)
+    assert rm.describe_reason(RejectReason.MAX_TRADES) == "Máximo de trades diários atingido: 7"
+
+
+def test_exposure_assignment_checked_live(tmp_path):
+    """Exposição atribuída direto no estado vale no próximo can_trade."""
+    rm = _manager(tmp_path)
+    assert rm.can_trade() == (True, RejectReason.ALLOWED)
+    assert rm.get_risk_metrics().current_exposure_pct == 0.0
+
+    rm.state.current_exposure_pct = rm.limits.max_exposure_pct
+    assert rm.can_trade() == (False, RejectReason.MAX_EXPOSURE)
+    assert rm.get_risk_metrics().current_exposure_pct == rm.limits.max_exposure_pct
+
+    rm.state.current_exposure_pct = 10.0
+    assert rm.can_trade() == (True, RejectReason.ALLOWED)
+
+
+def test_torn_journal_line_does_not_swallow_next_trade(tmp_path):
+    """Linha cortada no fim do journal: o próximo trade não cola nela."""
+    rm = _manager(tmp_path)
+    rm.record_trade(5.0, True)
+    rm.record_trade(6.0, True)
+    rm.flush()
+    with open(rm.journal_file, "ab") as f:
+        f.write(b'{"pnl": 7.0, "was')  # escrita interrompida
+
+    restarted = _manager(tmp_path)
+    restarted.record_trade(8.0, True)
+    restarted.flush()
+
+    history = list(_manager(tmp_path).state.trade_history)
+    assert [t["pnl"] for t in history] == [5.0, 6.0, 8.0]
+
+
+def test_legacy_history_migrated_to_journal(tmp_path):
+    """Histórico embutido no estado legado vira o journal numa única escrita."""
+    state_file = tmp_path / "risk_state.json"
+    legacy = [{"pnl": float(i), "was_win": True, "details": {}} for i in range(5)]
+    state_file.write_text(json.dumps({"trade_history": legacy}))
+
+    rm = _manager(tmp_path)
+    assert list(rm.state.trade_history) == legacy
+    assert rm._journal_lines == len(legacy)
+    assert list(_manager(tmp_path).state.trade_history) == legacy
+
+
+def test_limits_changed_at_runtime_apply_immediately(tmp_path):
+    """Limites alterados em tempo de execução valem no próximo can_trade."""
+    rm = _manager(tmp_path)
+    rm.record_trade(-50.0, False)
+    rm.record_trade(10.0, True)
+    assert rm.can_trade() == (True, RejectReason.ALLOWED)
+
+    rm.limits.max_trades_per_day = 2
+    assert rm.can_trade() == (False, RejectReason.MAX_TRADES)
+
+    rm.limits.max_trades_per_day = 10**6
+    rm.limits.max_daily_loss = 40.0
+    assert rm.can_trade() == (False, RejectReason.DAILY_LOSS)
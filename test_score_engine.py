@@ -0,0 +1,63 @@
+"""
+Testes do memo LRU do ScoreEngine.
+Executar com: python -m pytest -q test_score_engine.py
+"""
+
+from dataclasses import asdict
+
+from core.score_engine import ScoreEngine
+
+
+def _inputs():
+    market = {
+        "trend": {"consensus": {"direction": "BULLISH", "strength": 80}, "h1": {"ema_alignment": True}},
+        "momentum": {"score": 70, "direction": "BULLISH", "strength": "STRONG"},
+        "structure": {"type": "HIGHER_HIGH"},
+        "volume": {"available": True, "trend_confirmation": True, "volume_ratio": 1.4},
+        "movement_quality": {"classification": "STRONG"},
+        "volatility": {"classification": "NORMAL"},
+        "liquidity": {"score": 75},
+        "session": {"is_favorable": True},
+        "temporal_context": {"day_quality": 80},
+    }
+    patterns = {
+        "candle_patterns": {"m15": [{"strength": 85}], "h1": [{"strength": 70}]},
+        "chart_patterns": {"h1": [{"confidence": 80}]},
+    }
+    risk = {"current_drawdown_pct": 2.0, "exposure_pct": 10.0, "potential_profit": 150, "potential_loss": 50}
+    learning = {"similar_pattern_winrate": 55, "recent_consecutive_losses": 0}
+    return market, patterns, risk, learning
+
+
+def test_memo_hit_equals_fresh_score():
+    engine = ScoreEngine()
+    first = engine.calculate_comprehensive_score(*_inputs())
+    hit = engine.calculate_comprehensive_score(*_inputs())
+    fresh = ScoreEngine().calculate_comprehensive_score(*_inputs())
+
+    assert len(engine._memo) == 1
+    assert asdict(hit) == asdict(first) == asdict(fresh)
+
+    # Distribuição conta as chamadas servidas pelo memo
+    assert engine.get_score_distribution()["total_evaluations"] == 2
+
+
+def test_memo_returns_independent_copies():
+    engine = ScoreEngine()
+    first = engine.calculate_comprehensive_score(*_inputs())
+    first.components["trend"] = -1.0
+    first.reasons.append("mutated")
+    first.warnings.clear()
+
+    hit = engine.calculate_comprehensive_score(*_inputs())
+    fresh = ScoreEngine().calculate_comprehensive_score(*_inputs())
+    assert asdict(hit) == asdict(fresh)
+
+
+def test_unhashable_inputs_skip_memo():
+    engine = ScoreEngine()
+    market, patterns, risk, learning = _inputs()
+    market["session"]["tags"] = ["london"]
+
+    result = engine.calculate_comprehensive_score(market, patterns, risk, learning)
+    assert asdict(result) == asdict(ScoreEngine().calculate_comprehensive_score(market, patterns, risk, learning))
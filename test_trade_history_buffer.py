@@ -0,0 +1,126 @@
+"""
+Testes do TradeHistoryBuffer e da sincronização incremental do SimilarityMatcher.
+Executar com: python -m pytest -q test_trade_history_buffer.py
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.similarity_matcher import SimilarityMatcher
+from core.trade_history_buffer import INVALID, TradeHistoryBuffer
+
+
+def _trade(i, trend="BULLISH", pattern="engulfing_bullish", context=True):
+    return SimpleNamespace(
+        id=i,
+        pnl=float(i),
+        risk=1.0,
+        context={
+            "trend_direction": trend,
+            "volatility_level": "HIGH",
+            "market_structure": 1,
+            "pattern_type": pattern,
+            "session": "LONDON",
+            "momentum": 0.7,
+            "liquidity": 0.4,
+        } if context else None,
+    )
+
+
+def test_append_encodes_context():
+    buf = TradeHistoryBuffer(capacity=2)
+    buf.extend([_trade(0), _trade(1, trend="BEARISH", pattern="ENGULFING_bearish"), _trade(2, context=False)])
+
+    arrays = buf.arrays()
+    assert len(buf) == 3
+    assert buf.trade_ids == [0, 1, 2]
+    assert arrays["valid"].tolist() == [True, True, False]
+    assert arrays["trend"].tolist() == [0, 1, INVALID]
+    # Família do padrão em minúsculas: mesmo código para os dois trades
+    assert arrays["pattern"][0] == arrays["pattern"][1]
+    assert arrays["vol_num"].tolist() == [2, 2, 1]
+    np.testing.assert_array_equal(arrays["pnl"], [0.0, 1.0, 2.0])
+
+
+def test_clear_resets_filled_slots():
+    buf = TradeHistoryBuffer(capacity=4)
+    buf.extend([_trade(0), _trade(1)])
+    buf.clear()
+
+    assert len(buf) == 0
+    assert buf.trade_ids == []
+    assert buf.arrays()["valid"].size == 0
+
+    # Slot reutilizado sem contexto não herda valores do trade anterior
+    buf.append(_trade(5, context=False))
+    arrays = buf.arrays()
+    assert not arrays["valid"][0]
+    assert arrays["trend"][0] == INVALID
+    assert np.isnan(arrays["momentum"][0])
+
+
+def test_matcher_resync_appends_or_rebuilds():
+    matcher = SimilarityMatcher()
+    trades = [_trade(i) for i in range(3)]
+    matcher._ensure_history_arrays(trades)
+    matcher._memo["stale"] = np.zeros(3)
+
+    # Mesmos trades: nada muda, memo preservado
+    matcher._ensure_history_arrays(trades)
+    assert "stale" in matcher._memo
+
+    # Trades novos no fim: apenas anexados, memo invalidado
+    trades = trades + [_trade(3, trend="BEARISH")]
+    arrays = matcher._ensure_history_arrays(trades)
+    assert matcher._history.trade_ids == [0, 1, 2, 3]
+    assert arrays["trend"].tolist() == [0, 0, 0, 1]
+    assert not matcher._memo
+
+    # Histórico reescrito (prefixo diferente): buffer reconstruído
+    rebuilt = [_trade(10, trend="BEARISH"), _trade(11)]
+    arrays = matcher._ensure_history_arrays(rebuilt)
+    assert matcher._history.trade_ids == [10, 11]
+    np.testing.assert_array_equal(arrays["pnl"], [10.0, 11.0])
+
+
+def test_matcher_resync_reencodes_trades_changed_in_place():
+    matcher = SimilarityMatcher()
+    trades = [_trade(i) for i in range(3)]
+    matcher._ensure_history_arrays(trades)
+    matcher._memo["stale"] = np.zeros(3)
+
+    # Trade aberto fechado depois: mesmo id, pnl/contexto novos
+    trades[1].pnl = 42.0
+    trades[1].context["trend_direction"] = "BEARISH"
+    arrays = matcher._ensure_history_arrays(trades)
+    assert matcher._history.trade_ids == [0, 1, 2]
+    np.testing.assert_array_equal(arrays["pnl"], [0.0, 42.0, 2.0])
+    assert arrays["trend"].tolist() == [0, 1, 0]
+    assert not matcher._memo
+
+
+def test_match_confidence_uses_current_trade_values():
+    now = datetime.now().isoformat()
+    trades = [_trade(i) for i in range(3)]
+    for trade in trades:
+        trade.entry_time = now
+    memory = SimpleNamespace(get_trades_from_days_ago=lambda days: trades)
+    matcher = SimilarityMatcher(memory)
+    market = {
+        "trend": {"consensus": {"direction": "BULLISH"}},
+        "volatility": {"classification": "HIGH"},
+        "structure": {"strength": 1},
+        "session": {"current": "LONDON"},
+        "momentum": {"score": 70},
+        "liquidity": {"score": 40},
+    }
+    matcher.find_similar_situations({}, market, "engulfing_bullish")
+
+    trades[0].pnl = 3.0  # R = 3 depois da primeira busca
+    matches = matcher.find_similar_situations({}, market, "engulfing_bullish")
+    for match in matches:
+        trade = trades[match.historical_trade_id]
+        assert match.pnl == trade.pnl
+        assert match.confidence == matcher._calculate_confidence(trade)
@@ -13,6 +13,7 @@ Configure corretamente antes de executar.
 import time
 import os
 import sys
+from dataclasses import asdict
 from datetime import datetime
 from typing import Dict, Optional
 from dotenv import load_dotenv
@@ -116,7 +117,7 @@ class TradingBot:
             risk_quality=self.config["weights"]["risk_quality_weight"],
             context=self.config["weights"]["context_weight"]
         )
-        self.score_engine = ScoreEngine(custom_weights=score_weights.__dict__)
+        self.score_engine = ScoreEngine(custom_weights=asdict(score_weights))
         print("  ✓ Score Engine")
         
         # Risk Manager
@@ -200,7 +201,7 @@ class TradingBot:
             can_trade, reason = self.risk_manager.can_trade()
             
             if not can_trade:
-                self.logger.log_risk_event("TRADING_BLOCKED", reason)
+                self.logger.log_risk_event("TRADING_BLOCKED", self.risk_manager.describe_reason(reason))
                 return
             
             # ═══════════════════════════════════════
@@ -254,8 +255,8 @@ class TradingBot:
             # 6. CÁLCULO DE SCORE
             # ═══════════════════════════════════════
             risk_analysis = {
-                "current_drawdown_pct": self.risk_manager.state["current_drawdown_pct"],
-                "exposure_pct": self.risk_manager.state["current_exposure_pct"],
+                "current_drawdown_pct": self.risk_manager.state.current_drawdown_pct,
+                "exposure_pct": self.risk_manager.state.current_exposure_pct,
                 "potential_profit": 100,  # Estimativa
                 "potential_loss": 50      # Estimativa
             }
@@ -460,6 +461,9 @@ class TradingBot:
         # Fechar posições abertas (se configurado)
         # ...
         
+        # Persistir estado de risco pendente
+        self.risk_manager.flush()
+        
         # Log final
         stats = self.memory.get_statistics(days=1)
         self.logger.log_daily_summary(stats)